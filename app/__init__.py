@@ -8,7 +8,10 @@ import os
 db    = SQLAlchemy()
 login = LoginManager()
 
-def create_app():
+def create_app(minimal: bool = False, warm_up: bool = None, resume_jobs: bool = True):
+    # minimal=True – be vertimo modulio (torch/transformers neimportuojami), pvz. CLI skriptams
+    # warm_up – ar fone įšildyti modelius (pagal nutylėjimą Config.WARMUP_ON_START)
+    # resume_jobs=False – nebaigtų darbų netęsti (serve.py juos tęsia viename darbininke po fork())
     app = Flask(__name__, instance_relative_config=False)
     app.config.from_object("config.Config")
 
@@ -27,12 +30,35 @@ def create_app():
     # import blueprints
     from app.auth.auth              import auth_bp
     from app.auth.admin             import admin_bp
-    from app.translation.translate  import translation_bp
+    from app.health.health          import health_bp
+    from app.metrics.metrics        import metrics_bp, init_app as init_metrics
 
     # register blueprints *only once each*
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp, url_prefix="/admin")
-    app.register_blueprint(translation_bp, url_prefix="/translate")
+    app.register_blueprint(health_bp, url_prefix="/health")
+    app.register_blueprint(metrics_bp)
+    init_metrics(app)
+
+    if not minimal:
+        from app.translation.translate  import translation_bp, svc, job_service
+        app.register_blueprint(translation_bp, url_prefix="/translate")
+        app.extensions["translation_service"] = svc
+
+        # TM įrašai į DB rašomi fone partijomis; likutis įrašomas išjungiant procesą
+        svc.writer.init_app(app)
+
+        # Dokumentų vertimo darbai: po perkrovimo nebaigti darbai tęsiami
+        job_service.init_app(app)
+        if resume_jobs:
+            job_service.resume_pending()
+
+        if app.config["WARMUP_ON_START"] if warm_up is None else warm_up:
+            svc.start_warm_up()
+
+    # CLI komandos (flask tm-reindex ir kt.)
+    from app.cli import register_cli
+    register_cli(app)
 
     print("Galimi maršrutai:")
     for rule in app.url_map.iter_rules():
@@ -2,11 +2,14 @@
 
 from flask import (
     Blueprint, render_template, request, redirect,
-    url_for, flash, send_file
+    url_for, flash, send_file, jsonify, current_app,
+    Response, stream_with_context
 )
 from flask_login import login_required, current_user
 from app import db
 from app.database.models import User, TranslationMemory
+from app.translation.services.translation_memory import browse_memory
+from datetime import datetime, timedelta
 import os
 from os.path import basename
 
@@ -71,12 +74,75 @@ def delete_user(user_id):
         flash(f"Vartotojas “{user.username}” ištrintas", "success")
     return redirect(url_for("admin.dashboard"))
 
+def _memory_filters(args) -> dict:
+    # URL parametrai → browse_memory() filtrai; neteisingos reikšmės ignoruojamos
+    filters = {}
+    if args.get("user_id", type=int):
+        filters["user_id"] = args.get("user_id", type=int)
+    direction = args.get("direction", "")
+    if "-" in direction:
+        filters["source_lang"], filters["target_lang"] = direction.split("-", 1)
+    if args.get("doc") in ("0", "1"):
+        filters["is_document"] = args.get("doc") == "1"
+    for key in ("date_from", "date_to"):
+        try:
+            value = datetime.strptime(args.get(key, ""), "%Y-%m-%d")
+        except ValueError:
+            continue
+        # date_to imtinai: iki kitos dienos pradžios
+        filters[key] = value + timedelta(days=1) if key == "date_to" else value
+    return filters
+
 @admin_bp.route("/memory")
 def memory():
-    records = TranslationMemory.query.order_by(
-        TranslationMemory.id.desc()
-    ).all()
-    return render_template("memory.html", records=records)
+    page = browse_memory(
+        _memory_filters(request.args),
+        before=request.args.get("before", type=int),
+        after=request.args.get("after", type=int),
+        limit=current_app.config["ADMIN_TM_PAGE_SIZE"],
+        preview_chars=current_app.config["ADMIN_TM_PREVIEW_CHARS"]
+    )
+    # Filtrai išsaugomi puslapių nuorodose
+    keep = {k: v for k, v in request.args.items() if k not in ("before", "after") and v}
+    users = db.session.query(User.id, User.username).order_by(User.username).all()
+    return render_template(
+        "memory.html",
+        records=page["rows"],
+        next_url=url_for("admin.memory", before=page["next_before"], **keep) if page["next_before"] else None,
+        prev_url=url_for("admin.memory", after=page["prev_after"], **keep) if page["prev_after"] else None,
+        users=users,
+        args=request.args,
+        preview_chars=current_app.config["ADMIN_TM_PREVIEW_CHARS"]
+    )
+
+@admin_bp.route("/memory/<int:tm_id>")
+def memory_detail(tm_id):
+    # Pilni ilgų stulpelių tekstai kraunami tik paprašius
+    record = TranslationMemory.query.get_or_404(tm_id)
+    return jsonify({
+        "id": record.id,
+        "source_text": record.source_text,
+        "translated_text": record.translated_text,
+    })
+
+@admin_bp.route("/memory/export.<fmt>")
+def memory_export(fmt):
+    # Srautinis eksportas: atsakymas siunčiamas dalimis, atmintyje tik viena DB dalis
+    from app.translation.services.tm_exchange import export_csv, export_tmx, iter_export_rows
+
+    direction = request.args.get("direction", "")
+    if fmt not in ("tmx", "csv") or "-" not in direction:
+        return "Nurodykite formatą (tmx/csv) ir kryptį (?direction=lt-en)", 400
+    src, tgt = direction.split("-", 1)
+
+    units = iter_export_rows(src, tgt)
+    chunks = export_tmx(units, src, tgt) if fmt == "tmx" else export_csv(units)
+    mimetype = "application/x-tmx+xml" if fmt == "tmx" else "text/csv"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=f"{mimetype}; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename=tm_{src}_{tgt}.{fmt}"}
+    )
 
 @admin_bp.route('/download/<tm_id>/<which>', methods=['GET'])
 def download_memory_file(tm_id, which):
@@ -0,0 +1,89 @@
+# app/cli.py
+
+import click
+
+
+def register_cli(app):
+
+    @app.cli.command("tm-reindex")
+    @click.option("--chunk-size", default=1000, show_default=True)
+    def tm_reindex(chunk_size):
+        """Suindeksuoti Translation Memory įrašus apytikslei (fuzzy) paieškai."""
+        from app.translation.services.translation_memory import rebuild_fuzzy_index
+        indexed = rebuild_fuzzy_index(chunk_size=chunk_size)
+        click.echo(f"Suindeksuota įrašų: {indexed}")
+
+    @app.cli.command("tm-import")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--direction", required=True, help="pvz. lt-en")
+    @click.option("--user", "username", required=True, help="vartotojas, kuriam priskiriami įrašai")
+    @click.option("--format", "file_format", type=click.Choice(["tmx", "csv"]), default=None,
+                  help="numatyta pagal failo plėtinį")
+    @click.option("--chunk-size", default=1000, show_default=True)
+    @click.option("--resume/--restart", default=True, show_default=True,
+                  help="tęsti nebaigtą to paties failo importą")
+    @click.option("--skip-existing/--keep-duplicates", default=True, show_default=True)
+    @click.option("--fuzzy/--no-fuzzy", default=True, show_default=True,
+                  help="iškart kurti fuzzy indekso juostas (kitaip – vėliau flask tm-reindex)")
+    def tm_import(path, direction, username, file_format, chunk_size, resume, skip_existing, fuzzy):
+        """Srautinis TMX/CSV importas į Translation Memory (dalimis, su tęsimu)."""
+        from app.database.models import User
+        from app.translation.services.tm_exchange import (
+            import_units, iter_csv_units, iter_tmx_units, start_import
+        )
+
+        src, tgt = direction.split("-")
+        file_format = file_format or path.rsplit(".", 1)[-1].lower()
+        if file_format not in ("tmx", "csv"):
+            raise click.BadParameter("Nurodykite --format tmx arba csv")
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.BadParameter(f"Vartotojas '{username}' nerastas")
+
+        state = start_import(path, file_format, src, tgt, user.id, resume=resume)
+        if state.processed:
+            click.echo(f"Tęsiamas importas #{state.id} nuo {state.processed} vieneto")
+        units = iter_tmx_units(path, src, tgt) if file_format == "tmx" else iter_csv_units(path)
+
+        def progress(st, elapsed):
+            rate = (st.processed - resumed_from) / elapsed if elapsed else 0
+            click.echo(
+                f"  apdorota {st.processed}, įrašyta {st.inserted}, praleista {st.skipped} "
+                f"({rate:.0f} vnt./s)"
+            )
+
+        resumed_from = state.processed
+        state = import_units(units, state, chunk_size=chunk_size,
+                             skip_existing=skip_existing, fuzzy=fuzzy, progress=progress)
+        click.echo(f"Importas #{state.id} baigtas: įrašyta {state.inserted}, praleista {state.skipped}")
+
+    @app.cli.command("tm-export")
+    @click.argument("path", type=click.Path(dir_okay=False, writable=True))
+    @click.option("--direction", required=True, help="pvz. lt-en")
+    @click.option("--format", "file_format", type=click.Choice(["tmx", "csv"]), default=None,
+                  help="numatyta pagal failo plėtinį")
+    @click.option("--chunk-size", default=1000, show_default=True)
+    def tm_export(path, direction, file_format, chunk_size):
+        """Srautinis Translation Memory eksportas į TMX/CSV."""
+        from app.translation.services.tm_exchange import export_csv, export_tmx, iter_export_rows
+
+        src, tgt = direction.split("-")
+        file_format = file_format or path.rsplit(".", 1)[-1].lower()
+        if file_format not in ("tmx", "csv"):
+            raise click.BadParameter("Nurodykite --format tmx arba csv")
+
+        exported = 0
+
+        def counted():
+            nonlocal exported
+            for unit in iter_export_rows(src, tgt, chunk_size=chunk_size):
+                exported += 1
+                if exported % (chunk_size * 10) == 0:
+                    click.echo(f"  eksportuota {exported}")
+                yield unit
+
+        chunks = export_tmx(counted(), src, tgt) if file_format == "tmx" else export_csv(counted())
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        click.echo(f"Eksportuota vienetų: {exported} → {path}")
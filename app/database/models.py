@@ -34,9 +34,19 @@ def load_user(user_id):
 
 class TranslationMemory(db.Model):
     __tablename__ = 'translation_memory'
+    __table_args__ = (
+        # Tikslaus atitikmens paieška: normalizuoto šaltinio hash + kryptis
+        db.Index("ix_tm_exact_lookup", "source_hash", "source_lang", "target_lang"),
+        # Administratoriaus peržiūra: filtras + id (keyset puslapiavimas pagal id mažėjančia tvarka)
+        db.Index("ix_tm_user_id", "user_id", "id"),
+        db.Index("ix_tm_direction_id", "source_lang", "target_lang", "id"),
+        db.Index("ix_tm_document_id", "is_document", "id"),
+        db.Index("ix_tm_created_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     source_text = db.Column(db.Text, nullable=True)
+    source_hash = db.Column(db.String(40), nullable=True)
     translated_text = db.Column(db.Text, nullable=True)
     source_lang = db.Column(db.String(10))
     target_lang = db.Column(db.String(10))
@@ -61,4 +71,112 @@ class TranslationMemory(db.Model):
     user = db.relationship(
         "User",
         back_populates="translations"
-    )
\ No newline at end of file
+    )
+
+class TMFuzzyBand(db.Model):
+    # MinHash/LSH juostų indeksas apytiksliai TM paieškai (žr. translation/services/fuzzy_index.py)
+    __tablename__ = "tm_fuzzy_bands"
+    __table_args__ = (
+        db.Index("ix_tm_fuzzy_band_key", "band_key", "tm_id"),
+    )
+
+    id       = db.Column(db.Integer, primary_key=True)
+    tm_id    = db.Column(
+        db.Integer,
+        db.ForeignKey("translation_memory.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    band_key = db.Column(db.String(16), nullable=False)
+
+
+class TranslationJob(db.Model):
+    # Asinchroninis dokumento vertimo darbas; būsena DB, kad išliktų po perkrovimo
+    __tablename__ = "translation_jobs"
+
+    id          = db.Column(db.String(32), primary_key=True)
+    user_id     = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    status      = db.Column(db.String(16), nullable=False, default="queued", index=True)
+    source_lang = db.Column(db.String(10), nullable=False)
+    target_lang = db.Column(db.String(10), nullable=False)
+    file_type   = db.Column(db.String(8), nullable=False)
+    input_path  = db.Column(db.String(256), nullable=False)
+    output_path = db.Column(db.String(256), nullable=False)
+    out_name    = db.Column(db.String(128), nullable=False)
+    total       = db.Column(db.Integer, default=0)
+    done        = db.Column(db.Integer, default=0)
+    error       = db.Column(db.Text)
+    created_at  = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at  = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    # Vykdantis procesas ("host:pid") ir paskutinio progreso laikas – našlaičių darbams atpažinti
+    worker_id    = db.Column(db.String(64))
+    heartbeat_at = db.Column(db.DateTime)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "direction": f"{self.source_lang}-{self.target_lang}",
+            "done": self.done or 0,
+            "total": self.total or 0,
+            "error": self.error,
+            "download_url": f"/download/{self.out_name}" if self.status == "done" else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class ModelScore(db.Model):
+    # Kiekvieno modelio hibridiniai balai ir ar jis laimėjo; iš šios istorijos
+    # ModelRouter sprendžia, kuriuos modelius verta leisti (žr. translation/services/model_router.py)
+    __tablename__ = "model_scores"
+    __table_args__ = (
+        db.Index("ix_model_scores_route", "source_lang", "target_lang", "length_bucket", "full_run"),
+    )
+
+    id            = db.Column(db.Integer, primary_key=True)
+    source_lang   = db.Column(db.String(10), nullable=False)
+    target_lang   = db.Column(db.String(10), nullable=False)
+    length_bucket = db.Column(db.String(10), nullable=False)
+    model_key     = db.Column(db.String(64), nullable=False)
+    path          = db.Column(db.String(32))
+    bleu          = db.Column(db.Float)
+    chrf          = db.Column(db.Float)
+    bert          = db.Column(db.Float)
+    hybrid        = db.Column(db.Float)
+    is_winner     = db.Column(db.Boolean, nullable=False, default=False)
+    # True – vertė visi krypties modeliai (tik tokie įrašai naudojami laimėjimų statistikai)
+    full_run      = db.Column(db.Boolean, nullable=False, default=True)
+    created_at    = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class TMImport(db.Model):
+    # TMX/CSV importo būsena: processed – kiek vienetų jau apdorota (atnaujinama kartu su
+    # kiekvienos dalies įrašais), todėl nutrūkęs importas tęsiamas nuo ten, kur sustojo
+    __tablename__ = "tm_imports"
+    __table_args__ = (
+        db.Index("ix_tm_imports_source", "path", "file_size", "source_lang", "target_lang"),
+    )
+
+    id          = db.Column(db.Integer, primary_key=True)
+    path        = db.Column(db.String(512), nullable=False)
+    file_size   = db.Column(db.BigInteger, nullable=False)
+    file_format = db.Column(db.String(8), nullable=False)
+    source_lang = db.Column(db.String(10), nullable=False)
+    target_lang = db.Column(db.String(10), nullable=False)
+    user_id     = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    status      = db.Column(db.String(16), nullable=False, default="running")
+    processed   = db.Column(db.Integer, nullable=False, default=0)
+    inserted    = db.Column(db.Integer, nullable=False, default=0)
+    skipped     = db.Column(db.Integer, nullable=False, default=0)
+    created_at  = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at  = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,29 @@
+# app/database/schema.py
+
+from sqlalchemy import inspect, text
+from app import db
+
+
+def upgrade_schema():
+    # db.create_all() sukuria tik trūkstamas lenteles, todėl senose DB
+    # pridedame naujus stulpelius ir indeksus atskirai.
+    engine = db.engine
+    insp = inspect(engine)
+
+    for table in db.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+
+        existing = {col["name"] for col in insp.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            col_type = column.type.compile(dialect=engine.dialect)
+            print(f"🛠️ Pridedamas stulpelis {table.name}.{column.name} ({col_type})")
+            with engine.begin() as conn:
+                conn.execute(text(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}'
+                ))
+
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
@@ -0,0 +1,31 @@
+# app/health/health.py
+
+from flask import Blueprint, current_app, jsonify
+
+health_bp = Blueprint("health", __name__, url_prefix="/health")
+
+
+@health_bp.route("/live", methods=["GET"])
+def live():
+    return jsonify({"status": "ok"}), 200
+
+
+@health_bp.route("/ready", methods=["GET"])
+def ready():
+    svc = current_app.extensions.get("translation_service")
+    if svc is None:
+        return jsonify({"ready": False, "error": "Vertimo modulis neįjungtas (minimal režimas)"}), 503
+
+    report = svc.readiness()
+    return jsonify(report), 200 if report["ready"] else 503
+
+
+@health_bp.route("/memory", methods=["GET"])
+def memory():
+    # Šį atsakymą aptarnavusio proceso (darbininko) bendra ir privati atmintis
+    from app.health.memory import process_memory
+
+    report = process_memory()
+    if report is None:
+        return jsonify({"error": "Atminties ataskaita palaikoma tik Linux (/proc/<pid>/smaps)"}), 501
+    return jsonify(report), 200
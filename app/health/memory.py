@@ -0,0 +1,43 @@
+# app/health/memory.py
+
+import os
+from typing import Dict, Optional, Union
+
+# smaps laukai (kB), iš kurių skaičiuojama bendra (shared) ir privati proceso atmintis
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Swap")
+
+
+def _read_smaps(path: str) -> Dict[str, int]:
+    totals = {field: 0 for field in SMAPS_FIELDS}
+    with open(path) as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in totals:
+                totals[name] += int(rest.split()[0])
+    return totals
+
+
+def process_memory(pid: Union[int, str] = "self") -> Optional[dict]:
+    # Proceso atmintis MB: kiek puslapių dalijamasi su kitais procesais (pvz. po fork() bendri
+    # modelių svoriai) ir kiek privatūs. Tik Linux; kitur – None.
+    # smaps_rollup (Linux ≥ 4.14) jau susumuotas, senesniuose branduoliuose sumuojamas smaps.
+    base = f"/proc/{pid}"
+    try:
+        if os.path.exists(f"{base}/smaps_rollup"):
+            kb = _read_smaps(f"{base}/smaps_rollup")
+        else:
+            kb = _read_smaps(f"{base}/smaps")
+    except (FileNotFoundError, PermissionError, ProcessLookupError):
+        return None
+
+    shared = kb["Shared_Clean"] + kb["Shared_Dirty"]
+    private = kb["Private_Clean"] + kb["Private_Dirty"]
+    return {
+        "pid": os.getpid() if pid == "self" else int(pid),
+        "rss_mb": round(kb["Rss"] / 1024, 1),
+        # Pss – proporcinga dalis: bendri puslapiai padalinti iš juos naudojančių procesų skaičiaus
+        "pss_mb": round(kb["Pss"] / 1024, 1),
+        "shared_mb": round(shared / 1024, 1),
+        "private_mb": round(private / 1024, 1),
+        "swap_mb": round(kb["Swap"] / 1024, 1),
+    }
@@ -0,0 +1,207 @@
+# app/metrics/instruments.py
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Numatytosios vėlinimo histogramų ribos sekundėmis (nuo DB užklausų iki didelių modelių)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = float(value)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(k)} {v}" for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        # label → (kaupiamieji skaitikliai pagal ribą, suma, kiekis)
+        self._values: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [[0] * len(self.buckets), 0.0, 0]
+                self._values[key] = state
+            for i in range(idx, len(self.buckets)):
+                state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def mean(self, **labels) -> Optional[float]:
+        # Vidutinė stebėta reikšmė (None, jei stebėjimų nebuvo)
+        with self._lock:
+            state = self._values.get(_label_key(labels))
+        if not state or not state[2]:
+            return None
+        return state[1] / state[2]
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                for bound, c in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, (('le', repr(bound)),))} {c}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    # Procesui bendras metrikų rinkinys; render() grąžina Prometheus tekstinį formatą
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        out = []
+        for metric in metrics:
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(metric.render())
+        return "\n".join(out) + "\n"
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "translation_stage_seconds", "Vertimo konvejerio etapo trukmė sekundėmis"
+)
+STAGE_ERRORS = metrics.counter(
+    "translation_stage_errors_total", "Etapų, pasibaigusių klaida, skaičius"
+)
+
+# Užklausos etapų sąrašas (jei užklausa paprašė detalizacijos); perduodamas į gijas per copy_context()
+_request_stages: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar(
+    "request_stages", default=None
+)
+
+
+@contextmanager
+def stage(name: str, model: str = None):
+    # Matuoja etapą: histograma + klaidų skaitiklis + (jei renkama) užklausos detalizacija
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except Exception:
+        failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name, model=model)
+        if failed:
+            STAGE_ERRORS.inc(stage=name, model=model)
+        collected = _request_stages.get()
+        if collected is not None:
+            entry = {"stage": name, "seconds": round(elapsed, 4)}
+            if model:
+                entry["model"] = model
+            collected.append(entry)
+
+
+@contextmanager
+def collect_stages():
+    # with collect_stages() as timings: ... – visi viduje išmatuoti etapai patenka į timings
+    collected: list = []
+    token = _request_stages.set(collected)
+    try:
+        yield collected
+    finally:
+        _request_stages.reset(token)
+
+
+def summarize_stages(collected: list) -> dict:
+    # Etapų suma (lygiagrečių modelių laikai sumuojami, todėl gali viršyti užklausos trukmę)
+    totals: Dict[str, float] = {}
+    for entry in collected:
+        totals[entry["stage"]] = round(totals.get(entry["stage"], 0.0) + entry["seconds"], 4)
+    return {"stages": collected, "totals": totals}
@@ -0,0 +1,52 @@
+# app/metrics/metrics.py
+
+import time
+
+from flask import Blueprint, Response, current_app, g, request
+
+from app.metrics.instruments import metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+REQUESTS = metrics.counter("http_requests_total", "HTTP užklausų skaičius pagal maršrutą ir būseną")
+REQUEST_SECONDS = metrics.histogram("http_request_seconds", "HTTP užklausos trukmė sekundėmis")
+MODEL_RESIDENT = metrics.gauge("translation_model_resident", "Ar modelis laikomas atmintyje (1/0)")
+MODEL_SIZE = metrics.gauge("translation_model_size_bytes", "Pakrauto modelio dydis baitais")
+MODEL_LOAD_SECONDS = metrics.gauge("translation_model_load_seconds", "Paskutinio modelio pakrovimo trukmė")
+MODELS_RESIDENT_BYTES = metrics.gauge("translation_models_resident_bytes", "Visų pakrautų modelių dydis baitais")
+
+
+def init_app(app):
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _observe(response):
+        start = g.pop("_metrics_start", None)
+        if start is not None and request.endpoint != "metrics.metrics_endpoint":
+            endpoint = request.endpoint or "not_found"
+            REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+            REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+        return response
+
+
+def update_model_gauges():
+    # Modelių būsena imama iš registro skaitymo (scrape) metu
+    svc = current_app.extensions.get("translation_service")
+    if svc is None:
+        return
+    status = svc.hf_models.status()
+    for key, model in status["models"].items():
+        MODEL_RESIDENT.set(1 if model["state"] == "resident" else 0, model=key)
+        if model["size_mb"] is not None:
+            MODEL_SIZE.set(model["size_mb"] * 2**20, model=key)
+        if model.get("load_seconds") is not None:
+            MODEL_LOAD_SECONDS.set(model["load_seconds"], model=key)
+    MODELS_RESIDENT_BYTES.set(status["resident_mb"] * 2**20)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    update_model_gauges()
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,158 @@
+# app/ml_models/backends.py
+
+import os
+import threading
+from typing import Iterator, List
+
+from app.translation.constants import MBART_LANG_CODE
+
+
+def direction_kwargs(model_key: str, tok, source_lang: str, target_lang: str) -> dict:
+    # Nustato tokenizerio šaltinio kalbą ir grąžina papildomus generate() argumentus
+    if model_key.startswith("m2m100"):
+        tok.src_lang = source_lang
+        return {"forced_bos_token_id": tok.get_lang_id(target_lang)}
+
+    if model_key.startswith("mbart"):
+        if source_lang not in MBART_LANG_CODE or target_lang not in MBART_LANG_CODE:
+            raise ValueError(
+                f"mBART kodas nerastas kalbai: {source_lang} arba {target_lang}"
+            )
+        tok.src_lang = MBART_LANG_CODE[source_lang]
+        return {"forced_bos_token_id": tok.lang_code_to_id[MBART_LANG_CODE[target_lang]]}
+
+    return {}
+
+
+class _LockedDecoder:
+    # TextIteratorStreamer dekoduoja generate() gijoje; dekodavimas eina per backend'o užraktą
+    def __init__(self, tokenizer, lock: threading.Lock):
+        self._tokenizer = tokenizer
+        self._lock = lock
+
+    def decode(self, *args, **kwargs) -> str:
+        with self._lock:
+            return self._tokenizer.decode(*args, **kwargs)
+
+
+class TransformersBackend:
+    # transformers model.generate(); Marian/M2M100/mBART skirtumai paslėpti direction_kwargs()
+    name = "transformers"
+
+    def __init__(self, model_key: str, tokenizer, model):
+        self.model_key = model_key
+        self.tokenizer = tokenizer
+        self.model = model
+        # tok.src_lang keičiamas pagal kryptį, o greitasis (Rust) tokenizeris nepalaiko lygiagrečių
+        # kvietimų ("Already borrowed"), todėl visi tokenizerio kvietimai eina per šį užraktą
+        self._tok_lock = threading.Lock()
+
+    def encode(self, texts: List[str], source_lang: str, target_lang: str):
+        with self._tok_lock:
+            gen_kwargs = direction_kwargs(self.model_key, self.tokenizer, source_lang, target_lang)
+            encoded = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True)
+        return encoded, gen_kwargs
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        with self._tok_lock:
+            encoded = self.tokenizer(texts, add_special_tokens=True, truncation=True)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def decode(self, outs) -> List[str]:
+        with self._tok_lock:
+            return self.tokenizer.batch_decode(outs, skip_special_tokens=True)
+
+    def generate(self, texts: List[str], source_lang: str, target_lang: str, **kwargs) -> List[str]:
+        encoded, gen_kwargs = self.encode(texts, source_lang, target_lang)
+        outs = self.model.generate(**encoded, **gen_kwargs, **kwargs)
+        return self.decode(outs)
+
+    def generate_stream(self, text: str, source_lang: str, target_lang: str, **kwargs) -> Iterator[str]:
+        # Vieno teksto vertimas dalimis, kai tik žetonai dekoduojami (TextIteratorStreamer).
+        # Streamer'is nepalaiko beam search, todėl naudojamas godus dekodavimas.
+        from transformers import TextIteratorStreamer
+
+        encoded, gen_kwargs = self.encode([text], source_lang, target_lang)
+        streamer = TextIteratorStreamer(
+            _LockedDecoder(self.tokenizer, self._tok_lock), skip_prompt=True, skip_special_tokens=True
+        )
+        errors = []
+
+        def run():
+            try:
+                self.model.generate(
+                    **encoded, **gen_kwargs, **kwargs,
+                    num_beams=1, do_sample=False, streamer=streamer
+                )
+            except Exception as e:
+                errors.append(e)
+                streamer.end()
+
+        thread = threading.Thread(target=run, name=f"stream-{self.model_key}", daemon=True)
+        thread.start()
+        for piece in streamer:
+            if piece:
+                yield piece
+        thread.join()
+        if errors:
+            raise errors[0]
+
+    def size_bytes(self) -> int:
+        from app.ml_models.model_initializer import model_size_bytes
+        return model_size_bytes(self.model)
+
+
+class OnnxRuntimeBackend(TransformersBackend):
+    # ONNX Runtime enkoderis/dekoderis su KV cache (optimum ORTModelForSeq2SeqLM);
+    # generate() API toks pats, todėl vertinimo ir vertimo kodas nesikeičia
+    name = "onnxruntime"
+
+    def __init__(self, model_key: str, tokenizer, model, model_dir: str):
+        super().__init__(model_key, tokenizer, model)
+        self.model_dir = model_dir
+
+    def size_bytes(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.model_dir):
+            total += sum(
+                os.path.getsize(os.path.join(root, f))
+                for f in files if f.endswith((".onnx", ".onnx_data"))
+            )
+        return total
+
+
+def load_onnx_model(key: str, path: str, onnx_dir: str, precision: str = "fp32"):
+    # Pirmą kartą eksportuoja į ONNX (models_cache/onnx/<raktas>-<revizija>), vėliau krauna iš ten
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as e:
+        raise RuntimeError(
+            "ONNX Runtime backend'ui reikia: pip install optimum[onnxruntime]"
+        ) from e
+
+    if precision != "fp32":
+        raise ValueError(
+            f"ONNX Runtime backend'as palaiko tik fp32 (modelis '{key}' turi precision={precision})"
+        )
+
+    revision = os.path.basename(os.path.normpath(path))
+    export_dir = os.path.join(onnx_dir, f"{key}-{revision}")
+
+    if os.path.isdir(export_dir) and any(f.endswith(".onnx") for f in os.listdir(export_dir)):
+        print(f">>> HF '{key}': ONNX modelis iš kešo {export_dir}")
+        model = ORTModelForSeq2SeqLM.from_pretrained(export_dir, use_cache=True)
+    else:
+        print(f">>> HF '{key}': eksportuojama į ONNX ({export_dir})...")
+        model = ORTModelForSeq2SeqLM.from_pretrained(
+            path, export=True, use_cache=True, local_files_only=True
+        )
+        os.makedirs(export_dir, exist_ok=True)
+        model.save_pretrained(export_dir)
+
+    return model, export_dir
+
+
+BACKENDS = {
+    TransformersBackend.name: TransformersBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+}
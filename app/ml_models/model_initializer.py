@@ -1,6 +1,7 @@
 # app/ml_models/model_initializer.py
 
 import os
+import torch
 from huggingface_hub import snapshot_download
 from huggingface_hub.utils import RepositoryNotFoundError
 from easynmt import EasyNMT
@@ -13,6 +14,7 @@ from transformers import (
 
 HERE = os.path.dirname(__file__)
 CACHE_DIR = os.path.abspath(os.path.join(HERE, '..', '..', 'models_cache'))
+ONNX_DIR = os.path.join(CACHE_DIR, 'onnx')
 
 MODEL_CLASSES = {
     "lt_en":       (MarianTokenizer,             MarianMTModel),
@@ -26,6 +28,9 @@ MODEL_CLASSES = {
 ALLOWED_PAIRS = {("lt","en"), ("en","lt")}
 
 from app.translation.constants import HF_MODELS
+from app.ml_models.backends import (
+    BACKENDS, OnnxRuntimeBackend, TransformersBackend, load_onnx_model
+)
 MODEL_REPOS = {k: v["model_name"] for k, v in HF_MODELS.items()}
 
 def ensure_model(repo_id: str) -> Optional[str]:
@@ -42,47 +47,100 @@ def ensure_model(repo_id: str) -> Optional[str]:
         print(f"!!! Repo `{repo_id}` not found on HF, skipping.")
         return None
 
+def model_size_bytes(model) -> int:
+    # Svorių užimama RAM (naudojama modelių registro biudžetui). Einame per state_dict,
+    # nes kvantuotų Linear sluoksnių svoriai nėra parameters() sąraše.
+    def tensor_bytes(value):
+        if isinstance(value, torch.Tensor):
+            return value.numel() * value.element_size()
+        if isinstance(value, (tuple, list)):
+            return sum(tensor_bytes(v) for v in value)
+        return 0
+
+    return sum(tensor_bytes(v) for v in model.state_dict().values())
+
+def load_weights(key: str, path: str, ModelClass, precision: str = "fp32"):
+    if precision == "fp32":
+        return ModelClass.from_pretrained(path, local_files_only=True)
+
+    if precision == "bf16":
+        return ModelClass.from_pretrained(path, local_files_only=True, torch_dtype=torch.bfloat16)
+
+    if precision != "int8":
+        raise ValueError(f"Nežinomas tikslumas '{precision}' modeliui '{key}' (fp32 | bf16 | int8)")
+
+    # Dinaminis kvantavimas atliekamas kaskart krovimo metu (užtrunka kelias sekundes).
+    # Kvantuotas modelis į diską nekešuojamas: pickle'into modulio krovimas (torch.load) iš
+    # models_cache leistų įvykdyti kodą kiekvienam, galinčiam rašyti į tą katalogą
+    model = ModelClass.from_pretrained(path, local_files_only=True)
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def load_model(key: str, precision: Optional[str] = None, backend: Optional[str] = None) -> Optional[dict]:
+    repo_id = MODEL_REPOS[key]
+    precision = precision or HF_MODELS[key].get("precision", "fp32")
+    backend = backend or HF_MODELS[key].get("backend", "transformers")
+    print(f">>> Ensuring model '{key}' ({repo_id}, {precision}, {backend})...")
+    path = ensure_model(repo_id)
+    if not path:
+        return None
+
+    try:
+        TokClass, ModelClass = MODEL_CLASSES[key]
+        tok   = TokClass.from_pretrained(path, local_files_only=True)
+
+        if backend == OnnxRuntimeBackend.name:
+            model, export_dir = load_onnx_model(key, path, ONNX_DIR, precision)
+            engine = OnnxRuntimeBackend(key, tok, model, export_dir)
+        elif backend == TransformersBackend.name:
+            model = load_weights(key, path, ModelClass, precision)
+            model.eval()
+            engine = TransformersBackend(key, tok, model)
+        else:
+            raise ValueError(f"Nežinomas backend'as '{backend}' modeliui '{key}' ({list(BACKENDS)})")
+
+        if key.startswith("m2m100"):
+            codes = set(tok.lang_code_to_id.keys())
+            langs = {(s, t) for s, t in ALLOWED_PAIRS
+                        if s in codes and t in codes}
+
+        elif key.startswith("mbart50"):
+            codes = set(tok.lang_code_to_id.keys())
+            langs = {
+                (sc, tc)
+                for src, tgt in ALLOWED_PAIRS
+                for sc in codes if sc.startswith(f"{src}_")
+                for tc in codes if tc.startswith(f"{tgt}_")
+            }
+
+        else:
+            src, tgt = key.split("_")
+            langs = {(src, tgt)}
+
+        if not langs:
+            raise ValueError(
+                f"Model '{key}' ({path}) nepalaiko nė vienos ALLOWED_PAIRS poros: {ALLOWED_PAIRS}."
+            )
+
+        print(f">>> HF '{key}' supports: {langs}")
+        return {
+            "tokenizer": tok,
+            "model": model,
+            "langs": langs,
+            "precision": precision,
+            "backend": engine,
+        }
+
+    except Exception as e:
+        print(f"!!! HF init failed for {key}: {e}")
+        return None
+
 def load_models():
     hf_models = {}
 
-    for key, repo_id in MODEL_REPOS.items():
-        print(f">>> Ensuring model '{key}' ({repo_id})...")
-        path = ensure_model(repo_id)
-        if not path:
-            continue
-
-        try:
-            TokClass, ModelClass = MODEL_CLASSES[key]
-            tok   = TokClass.from_pretrained(path, local_files_only=True)
-            model = ModelClass.from_pretrained(path, local_files_only=True)
-
-            if key.startswith("m2m100"):
-                codes = set(tok.lang_code_to_id.keys())
-                langs = {(s, t) for s, t in ALLOWED_PAIRS
-                            if s in codes and t in codes}
-
-            elif key.startswith("mbart50"):
-                codes = set(tok.lang_code_to_id.keys())
-                langs = {
-                    (sc, tc)
-                    for src, tgt in ALLOWED_PAIRS
-                    for sc in codes if sc.startswith(f"{src}_")
-                    for tc in codes if tc.startswith(f"{tgt}_")
-                }
-
-            else:
-                src, tgt = key.split("_")
-                langs = {(src, tgt)}
-
-            if not langs:
-                raise ValueError(
-                    f"Model '{key}' ({path}) nepalaiko nė vienos ALLOWED_PAIRS poros: {ALLOWED_PAIRS}."
-                )
-
-            hf_models[key] = {"tokenizer": tok, "model": model, "langs": langs}
-            print(f">>> HF '{key}' supports: {langs}")
-
-        except Exception as e:
-            print(f"!!! HF init failed for {key}: {e}")
-
-    return hf_models
\ No newline at end of file
+    for key in MODEL_REPOS:
+        info = load_model(key)
+        if info is not None:
+            hf_models[key] = info
+
+    return hf_models
@@ -0,0 +1,172 @@
+# app/ml_models/registry.py
+
+import gc
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from app.metrics.instruments import metrics
+from app.ml_models.model_initializer import MODEL_REPOS, load_model
+from app.translation.constants import HF_MODELS
+
+
+MODEL_LOADS = metrics.counter("translation_model_loads_total", "Modelių pakrovimai (result=ok|failed)")
+MODEL_EVICTIONS = metrics.counter("translation_model_evictions_total", "Iš atminties iškelti modeliai")
+
+
+class ModelRegistry:
+    # Modeliai kraunami pirmą kartą prireikus krypčiai ir laikomi RAM biudžete;
+    # viršijus biudžetą iškeliamas seniausiai naudotas (LRU) modelis.
+
+    def __init__(self, budget_mb: int = 0, loader: Callable[[str], Optional[dict]] = load_model,
+                 retry_after: float = 300.0):
+        self.budget_bytes = int(budget_mb) * 1024 * 1024
+        self.retry_after = retry_after
+        self._loader = loader
+        self._models: "OrderedDict[str, dict]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._last_used: Dict[str, float] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._failed: Dict[str, float] = {}
+        self._loading: set = set()
+        self._lock = threading.RLock()
+        self._key_locks: Dict[str, threading.Lock] = {key: threading.Lock() for key in MODEL_REPOS}
+
+    def known_keys(self) -> list:
+        return list(MODEL_REPOS)
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._models)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._models
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(self._sizes[key] for key in self._models)
+
+    def get(self, key: str, default=None) -> Optional[dict]:
+        if key not in self._key_locks:
+            return default
+
+        with self._lock:
+            # Nepavykęs modelis bandomas krauti iš naujo tik po retry_after sekundžių
+            failed_at = self._failed.get(key)
+            if failed_at is not None and time.time() - failed_at < self.retry_after:
+                return default
+            if key in self._models:
+                self._models.move_to_end(key)
+                self._last_used[key] = time.time()
+                return self._models[key]
+
+        with self._key_locks[key]:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    self._last_used[key] = time.time()
+                    return self._models[key]
+                # Jei dydis žinomas iš ankstesnio pakrovimo, vietą atlaisviname iš anksto
+                if key in self._sizes:
+                    self._evict(incoming=self._sizes[key])
+                self._loading.add(key)
+
+            start = time.time()
+            try:
+                info = self._loader(key)
+            finally:
+                with self._lock:
+                    self._loading.discard(key)
+
+            if info is None:
+                with self._lock:
+                    self._failed[key] = time.time()
+                MODEL_LOADS.inc(model=key, result="failed")
+                return default
+
+            size = info["backend"].size_bytes()
+            with self._lock:
+                self._failed.pop(key, None)
+                self._models[key] = info
+                self._sizes[key] = size
+                self._last_used[key] = time.time()
+                self._load_seconds[key] = time.time() - start
+                self._evict(keep=key)
+            MODEL_LOADS.inc(model=key, result="ok")
+            print(
+                f"📦 [registry] '{key}' pakrautas per {time.time() - start:.1f} s "
+                f"({size / 2**20:.0f} MB, viso {self.resident_bytes() / 2**20:.0f} MB)"
+            )
+            return info
+
+    def for_direction(self, src: str, tgt: str, keys: Optional[list] = None) -> Dict[str, dict]:
+        # keys – (nebūtinas) modelių poaibis, pvz. parinktas ModelRouter; kiti nekraunami
+        active = {}
+        for key in self.known_keys():
+            if keys is not None and key not in keys:
+                continue
+            for static_src, static_tgt in HF_MODELS.get(key, {}).get("directions", []):
+                if static_src.split("_")[0] == src and static_tgt.split("_")[0] == tgt:
+                    info = self.get(key)
+                    if info is not None:
+                        active[key] = info
+                    break
+        return active
+
+    def evict(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._models:
+                return False
+            del self._models[key]
+        MODEL_EVICTIONS.inc(model=key)
+        gc.collect()
+        print(f"♻️ [registry] '{key}' iškeltas iš atminties")
+        return True
+
+    def _evict(self, keep: Optional[str] = None, incoming: int = 0):
+        # Kviečiama laikant self._lock
+        if not self.budget_bytes:
+            return
+        evicted = []
+        while self._models:
+            total = sum(self._sizes[k] for k in self._models) + incoming
+            if total <= self.budget_bytes:
+                break
+            victim = next((k for k in self._models if k != keep), None)
+            if victim is None:
+                break
+            del self._models[victim]
+            MODEL_EVICTIONS.inc(model=victim)
+            evicted.append(victim)
+        if evicted:
+            gc.collect()
+            print(f"♻️ [registry] Viršytas {self.budget_bytes / 2**20:.0f} MB biudžetas, iškelti: {evicted}")
+
+    def status(self) -> dict:
+        with self._lock:
+            models = {}
+            for key in self.known_keys():
+                if key in self._models:
+                    state = "resident"
+                elif key in self._loading:
+                    state = "loading"
+                elif key in self._failed:
+                    state = "failed"
+                else:
+                    state = "not_loaded"
+                models[key] = {
+                    "state": state,
+                    "precision": HF_MODELS.get(key, {}).get("precision", "fp32"),
+                    "backend": HF_MODELS.get(key, {}).get("backend", "transformers"),
+                    "size_mb": round(self._sizes[key] / 2**20, 1) if key in self._sizes else None,
+                    "last_used": self._last_used.get(key),
+                    "load_seconds": self._load_seconds.get(key),
+                }
+            return {
+                "budget_mb": self.budget_bytes // 2**20 or None,
+                "resident_mb": round(sum(self._sizes[k] for k in self._models) / 2**20, 1),
+                "resident": list(self._models),
+                "models": models,
+            }
@@ -1,28 +1,51 @@
 # app/translation/constants.py
 
+# "precision": fp32 | bf16 | int8 (dinaminis Linear sluoksnių kvantavimas krovimo metu).
+# Prieš keičiant verta palyginti kokybę: python compare_precision.py --help
+# "backend": transformers | onnxruntime (ONNX eksportas į models_cache/onnx, reikia optimum[onnxruntime])
 HF_MODELS = {
     "lt_en": {
         "model_name": "Helsinki-NLP/opus-mt-tc-big-lt-en",
-        "directions": [("lt", "en")]
+        "directions": [("lt", "en")],
+        "precision": "fp32",
+        "backend": "transformers"
     },
     "en_lt": {
         "model_name": "Helsinki-NLP/opus-mt-tc-big-en-lt",
-        "directions": [("en", "lt")]
+        "directions": [("en", "lt")],
+        "precision": "fp32",
+        "backend": "transformers"
     },
     "m2m100_418M": {
         "model_name": "facebook/m2m100_418M",
-        "directions": [("en", "lt"), ("lt", "en")]
+        "directions": [("en", "lt"), ("lt", "en")],
+        "precision": "fp32",
+        "backend": "transformers"
     },
     "m2m100_1.2B": {
         "model_name": "facebook/m2m100_1.2B",
-        "directions": [("en", "lt"), ("lt", "en")]
+        "directions": [("en", "lt"), ("lt", "en")],
+        "precision": "fp32",
+        "backend": "transformers"
     },
     "mbart50_en2m": {
         "model_name": "facebook/mbart-large-50-one-to-many-mmt",
-        "directions": [("en_XX", "lt_LT")]
+        "directions": [("en_XX", "lt_LT")],
+        "precision": "fp32",
+        "backend": "transformers"
     },
     "mbart50_m2en": {
         "model_name": "facebook/mbart-large-50-many-to-one-mmt",
-        "directions": [("lt_LT", "en_XX")]
+        "directions": [("lt_LT", "en_XX")],
+        "precision": "fp32",
+        "backend": "transformers"
     }
 }
+
+
+# mBART kalbų žemėlapis
+MBART_LANG_CODE = {
+    "en": "en_XX",
+    "lt": "lt_LT",
+    # Galite pridėti ir kitas, jei prireiks
+}
@@ -0,0 +1,65 @@
+# app/translation/services/evaluation/batch.py
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+from sacrebleu.metrics import BLEU, CHRF
+
+from app.metrics.instruments import stage
+from config import Config
+
+
+class ReferenceScorer:
+    # Viena nuoroda (šaltinio tekstas) ir N hipotezių: nuorodos n-gramų statistika
+    # apskaičiuojama vieną kartą (sacrebleu references=...), hipotezės vertinamos jos atžvilgiu.
+    # Vieno segmento corpus_score() = sentence_bleu(effective_order=True) / sentence chrF.
+
+    def __init__(self, reference: str):
+        self.reference = reference
+        self._bleu = BLEU(effective_order=True, references=[[reference]])
+        self._chrf = CHRF(references=[[reference]])
+
+    def bleu(self, hypotheses: List[str]) -> List[float]:
+        scores = {h: float(self._bleu.corpus_score([h], None).score) for h in dict.fromkeys(hypotheses)}
+        return [scores[h] for h in hypotheses]
+
+    def chrf(self, hypotheses: List[str]) -> List[float]:
+        scores = {h: float(self._chrf.corpus_score([h], None).score) for h in dict.fromkeys(hypotheses)}
+        return [scores[h] for h in hypotheses]
+
+
+_scorers: "OrderedDict[str, ReferenceScorer]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def reference_scorer(reference: str) -> ReferenceScorer:
+    # LRU talpykla: tas pats šaltinis vertinamas visiems kandidatams ir reverse modeliams
+    with _lock:
+        scorer = _scorers.get(reference)
+        if scorer is not None:
+            _scorers.move_to_end(reference)
+            return scorer
+
+    scorer = ReferenceScorer(reference)
+    with _lock:
+        _scorers[reference] = scorer
+        while len(_scorers) > Config.METRIC_REF_CACHE_SIZE:
+            _scorers.popitem(last=False)
+    return scorer
+
+
+def clear_reference_scorers():
+    with _lock:
+        _scorers.clear()
+
+
+def score_hypotheses(reference: str, hypotheses: List[str]) -> Dict[str, List[float]]:
+    # {"bleu": [...], "chrf": [...]} – po vieną balą kiekvienai hipotezei, ta pačia tvarka;
+    # kiekviena metrika matuojama atskiru etapu
+    scorer = reference_scorer(reference)
+    with stage("bleu"):
+        bleu = scorer.bleu(hypotheses)
+    with stage("chrf"):
+        chrf = scorer.chrf(hypotheses)
+    return {"bleu": bleu, "chrf": chrf}
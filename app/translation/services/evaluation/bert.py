@@ -1,12 +1,151 @@
 # app/translation/services/evaluation/bert.py
 
+import threading
+from collections import OrderedDict, defaultdict
+from typing import List, Optional
+
+import torch
 from bert_score import BERTScorer
+from bert_score.utils import get_bert_embedding, greedy_cos_idf
+from torch.nn.utils.rnn import pad_sequence
+
+from config import Config
+
+
+class BertScoreEngine:
+    # Vienas ilgai gyvenantis BERTScorer: enkoderis kraunamas vieną kartą,
+    # visos (hipotezė, šaltinis) poros įvertinamos viena partija,
+    # o šaltinio (reference) įterpiniai laikomi LRU talpykloje.
+
+    def __init__(self, model_type: str = "xlm-roberta-base", lang: str = "lt",
+                 cache_size: Optional[int] = None, num_layers: Optional[int] = None):
+        self.model_type = model_type
+        self.lang = lang
+        # Vietiniam (ne bert_score sąraše esančiam) modeliui sluoksnių skaičius nurodomas aiškiai
+        self.num_layers = num_layers
+        self.cache_size = cache_size if cache_size is not None else Config.BERT_REF_CACHE_SIZE
+        self._scorer = None
+        self._idf_dict = None
+        self._load_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._ref_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+    @property
+    def loaded(self) -> bool:
+        return self._scorer is not None
+
+    def load(self) -> BERTScorer:
+        if self._scorer is None:
+            with self._load_lock:
+                if self._scorer is None:
+                    scorer = BERTScorer(
+                        lang=self.lang,
+                        model_type=self.model_type,
+                        num_layers=self.num_layers,
+                        rescale_with_baseline=False
+                    )
+                    idf_dict = defaultdict(lambda: 1.0)
+                    idf_dict[scorer._tokenizer.sep_token_id] = 0
+                    idf_dict[scorer._tokenizer.cls_token_id] = 0
+                    self._idf_dict = idf_dict
+                    self._scorer = scorer
+        return self._scorer
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._ref_cache.clear()
+
+    def _embed(self, sentences: List[str]) -> dict:
+        scorer = self.load()
+        stats = {}
+        if not sentences:
+            return stats
+        embs, masks, padded_idf = get_bert_embedding(
+            sentences, scorer._model, scorer._tokenizer, self._idf_dict,
+            batch_size=scorer.batch_size, device=scorer.device,
+            all_layers=scorer.all_layers
+        )
+        embs, masks, padded_idf = embs.cpu(), masks.cpu(), padded_idf.cpu()
+        for i, sen in enumerate(sentences):
+            seq_len = int(masks[i].sum().item())
+            stats[sen] = (embs[i, :seq_len], padded_idf[i, :seq_len])
+        return stats
+
+    def _reference_stats(self, references: List[str]) -> dict:
+        stats = {}
+        missing = []
+        with self._cache_lock:
+            for ref in dict.fromkeys(references):
+                if ref in self._ref_cache:
+                    self._ref_cache.move_to_end(ref)
+                    stats[ref] = self._ref_cache[ref]
+                else:
+                    missing.append(ref)
+
+        if missing:
+            computed = self._embed(missing)
+            stats.update(computed)
+            with self._cache_lock:
+                for ref, value in computed.items():
+                    self._ref_cache[ref] = value
+                    self._ref_cache.move_to_end(ref)
+                while len(self._ref_cache) > self.cache_size:
+                    self._ref_cache.popitem(last=False)
+        return stats
+
+    @staticmethod
+    def _pad(stats: list, device):
+        embs = [e.to(device) for e, _ in stats]
+        idfs = [i.to(device) for _, i in stats]
+        lens = [e.size(0) for e in embs]
+        emb_pad = pad_sequence(embs, batch_first=True, padding_value=2.0)
+        idf_pad = pad_sequence(idfs, batch_first=True)
+        lens = torch.tensor(lens, dtype=torch.long, device=device)
+        mask = (torch.arange(emb_pad.size(1), device=device)[None, :] < lens[:, None]).long()
+        return emb_pad, mask, idf_pad
+
+    def score(self, hypotheses: List[str], references: List[str]) -> List[float]:
+        if len(hypotheses) != len(references):
+            raise ValueError("Hipotezių ir nuorodų skaičius turi sutapti")
+        if not hypotheses:
+            return []
+
+        scorer = self.load()
+        ref_stats = self._reference_stats(references)
+        hyp_stats = self._embed(list(dict.fromkeys(hypotheses)))
+
+        f1_scores: List[float] = []
+        batch_size = max(1, scorer.batch_size)
+        for start in range(0, len(hypotheses), batch_size):
+            hyps = hypotheses[start:start + batch_size]
+            refs = references[start:start + batch_size]
+            ref_emb, ref_mask, ref_idf = self._pad([ref_stats[r] for r in refs], scorer.device)
+            hyp_emb, hyp_mask, hyp_idf = self._pad([hyp_stats[h] for h in hyps], scorer.device)
+            _, _, F1 = greedy_cos_idf(
+                ref_emb, ref_mask, ref_idf,
+                hyp_emb, hyp_mask, hyp_idf,
+                scorer.all_layers
+            )
+            f1_scores.extend(F1.cpu().tolist())
+        return f1_scores
+
+
+_engine: Optional[BertScoreEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_bert_engine() -> BertScoreEngine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = BertScoreEngine(
+                    model_type=Config.BERT_MODEL_TYPE,
+                    num_layers=Config.BERT_NUM_LAYERS or None
+                )
+    return _engine
+
 
 def compute_bert_f1(hypotheses: list[str], references: list[str], lang: str) -> list[float]:
-    scorer = BERTScorer(
-        lang=lang,
-        model_type="xlm-roberta-base",
-        rescale_with_baseline=False
-    )
-    P, R, F1 = scorer.score(hypotheses, references)
-    return F1.tolist()
+    # lang paliktas dėl suderinamumo: model_type nurodytas aiškiai, baseline nenaudojamas
+    return get_bert_engine().score(hypotheses, references)
@@ -0,0 +1,57 @@
+# app/translation/services/fuzzy_index.py
+
+import hashlib
+import random
+import zlib
+from difflib import SequenceMatcher
+from typing import List, Set
+
+from app.translation.services.segmentation import normalize_segment
+
+# MinHash parametrai: 16 juostų × 4 eilutės ≈ 0.5 Jaccard slenkstis kandidatams.
+# Pakeitus šias reikšmes indeksą reikia perkurti (flask tm-reindex).
+NGRAM_SIZE = 3
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def fuzzy_text(text: str) -> str:
+    return normalize_segment(text).lower()
+
+
+def shingles(text: str, n: int = NGRAM_SIZE) -> Set[str]:
+    norm = f" {fuzzy_text(text)} "
+    if len(norm) <= n:
+        return {norm}
+    return {norm[i:i + n] for i in range(len(norm) - n + 1)}
+
+
+def minhash_signature(grams: Set[str]) -> List[int]:
+    hashes = [zlib.crc32(g.encode("utf-8")) for g in grams]
+    return [
+        min((a * h + b) % _PRIME for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def band_keys(text: str, source_lang: str, target_lang: str) -> List[str]:
+    # Kiekviena juosta → trumpas raktas; kryptis įeina į raktą, kad indeksas būtų atskiras
+    signature = minhash_signature(shingles(text))
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        raw = f"{source_lang}|{target_lang}|{band}|" + ",".join(map(str, rows))
+        keys.append(hashlib.sha1(raw.encode("ascii")).hexdigest()[:16])
+    return keys
+
+
+def similarity(a: str, b: str) -> float:
+    return SequenceMatcher(None, fuzzy_text(a), fuzzy_text(b)).ratio()
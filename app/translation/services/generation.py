@@ -0,0 +1,137 @@
+# app/translation/services/generation.py
+
+from typing import Callable, Dict, Iterator, List, Optional
+
+from config import Config
+from app.ml_models.backends import TransformersBackend
+from app.translation.services.segmentation import split_sentences, join_sentences
+
+
+def backend_for(model_key: str, info: dict):
+    # Registro įrašai jau turi backend'ą; paprastiems {tokenizer, model} žodynams sukuriamas transformers
+    backend = info.get("backend")
+    if backend is None:
+        backend = TransformersBackend(model_key, info["tokenizer"], info["model"])
+        info["backend"] = backend
+    return backend
+
+
+def make_batches(
+    lengths: List[int],
+    batch_size: int,
+    max_batch_tokens: int
+) -> List[List[int]]:
+    # Rūšiuojame pagal ilgį, kad vienoje partijoje būtų panašaus ilgio sakiniai (mažiau padding)
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches: List[List[int]] = []
+    current: List[int] = []
+    longest = 0
+
+    for idx in order:
+        new_longest = max(longest, lengths[idx])
+        too_many = len(current) >= batch_size
+        too_long = new_longest * (len(current) + 1) > max_batch_tokens
+        if current and (too_many or too_long):
+            batches.append(current)
+            current = []
+            new_longest = lengths[idx]
+        current.append(idx)
+        longest = new_longest
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def generate_batch(
+    model_key: str,
+    info: dict,
+    texts: List[str],
+    source_lang: str,
+    target_lang: str
+) -> List[str]:
+    return backend_for(model_key, info).generate(texts, source_lang, target_lang)
+
+
+def generate_texts(
+    model_key: str,
+    info: dict,
+    texts: List[str],
+    source_lang: str,
+    target_lang: str,
+    batch_size: Optional[int] = None,
+    max_batch_tokens: Optional[int] = None
+) -> List[str]:
+    # Verčia kiekvieną tekstą kaip vieną seką; vienodi tekstai verčiami tik kartą
+    batch_size = batch_size or Config.TRANSLATION_BATCH_SIZE
+    max_batch_tokens = max_batch_tokens or Config.TRANSLATION_MAX_BATCH_TOKENS
+
+    unique: Dict[str, int] = {}
+    for text in texts:
+        if text.strip() and text not in unique:
+            unique[text] = len(unique)
+    if not unique:
+        return [""] * len(texts)
+
+    unique_texts = list(unique)
+    lengths = backend_for(model_key, info).token_lengths(unique_texts)
+    outputs = [""] * len(unique_texts)
+
+    for batch in make_batches(lengths, batch_size, max_batch_tokens):
+        batch_texts = [unique_texts[i] for i in batch]
+        for idx, out in zip(batch, generate_batch(
+            model_key, info, batch_texts, source_lang, target_lang
+        )):
+            outputs[idx] = out
+
+    return [outputs[unique[t]] if t in unique else "" for t in texts]
+
+
+def translate_texts(
+    model_key: str,
+    info: dict,
+    texts: List[str],
+    source_lang: str,
+    target_lang: str,
+    batch_size: Optional[int] = None,
+    max_batch_tokens: Optional[int] = None,
+    generate: Optional[Callable[..., List[str]]] = None
+) -> List[str]:
+    # Skaido tekstus į sakinius, verčia visus sakinius partijomis ir surenka atgal originalia tvarka;
+    # generate – alternatyvus sakinių vertėjas (pvz. MicroBatcher.generate)
+    splits = [split_sentences(text) for text in texts]
+    flat = [sentence for sentences, _ in splits for sentence in sentences]
+
+    if generate is not None:
+        translated = generate(model_key, info, flat, source_lang, target_lang)
+    else:
+        translated = generate_texts(
+            model_key, info, flat, source_lang, target_lang,
+            batch_size=batch_size, max_batch_tokens=max_batch_tokens
+        )
+
+    results: List[str] = []
+    pos = 0
+    for sentences, separators in splits:
+        n = len(sentences)
+        results.append(join_sentences(translated[pos:pos + n], separators))
+        pos += n
+    return results
+
+
+def stream_text(
+    model_key: str,
+    info: dict,
+    text: str,
+    source_lang: str,
+    target_lang: str
+) -> Iterator[str]:
+    # Sakiniai verčiami paeiliui, kiekvieno vertimas grąžinamas dalimis dekodavimo metu;
+    # "".join(stream_text(...)) atkuria originalų išdėstymą kaip translate_texts
+    sentences, separators = split_sentences(text)
+    backend = backend_for(model_key, info)
+    for pos, sentence in enumerate(sentences):
+        if pos:
+            yield separators[pos - 1]
+        if sentence.strip():
+            yield from backend.generate_stream(sentence, source_lang, target_lang)
@@ -0,0 +1,219 @@
+# app/translation/services/job_service.py
+
+import os
+import socket
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta
+
+from app import db
+from app.database.models import TranslationJob
+from config import Config
+
+
+class JobService:
+    # Dokumentų vertimas foniniame gijų telkinyje; būsena ir progresas saugomi translation_jobs lentelėje
+
+    def __init__(self, translation_service, document_service, workers: int = None):
+        self.svc = translation_service
+        self.documents = document_service
+        self.workers = workers or Config.JOB_WORKERS
+        self.app = None
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        # Šiame procese vykdomi darbai
+        self._active: set = set()
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["job_service"] = self
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Gijų telkinys kuriamas tingiai ir iš naujo po fork(), nes gijos nepersikelia į vaiko procesą
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="doc-job"
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def create_job(self, user_id: int, src: str, tgt: str, file_type: str,
+                   input_path: str, output_path: str, out_name: str) -> TranslationJob:
+        job = TranslationJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            status="queued",
+            source_lang=src,
+            target_lang=tgt,
+            file_type=file_type,
+            input_path=input_path,
+            output_path=output_path,
+            out_name=out_name,
+        )
+        db.session.add(job)
+        db.session.commit()
+        self.submit(job.id)
+        return job
+
+    def submit(self, job_id: str):
+        self._get_executor().submit(self._run, job_id)
+
+    @staticmethod
+    def worker_id() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def is_orphaned(self, job: TranslationJob) -> bool:
+        # Vykdomas darbas yra našlaitis, kai jį vykdęs procesas nebegyvas (tame pačiame hoste)
+        # arba ilgiau nei JOB_STALE_S nebuvo progreso
+        if job.id in self._active:
+            return False
+        host, _, pid = (job.worker_id or "").rpartition(":")
+        if host == socket.gethostname() and pid.isdigit():
+            if int(pid) == os.getpid():
+                return True
+            # os.kill(pid, 0) tik tikrina, ar procesas egzistuoja (Windows sistemoje jis procesą nutrauktų)
+            if os.name == "posix":
+                try:
+                    os.kill(int(pid), 0)
+                except ProcessLookupError:
+                    return True
+                except PermissionError:
+                    pass
+        last_seen = job.heartbeat_at or job.started_at
+        return last_seen is None or datetime.utcnow() - last_seen > timedelta(seconds=Config.JOB_STALE_S)
+
+    def resume_pending(self) -> int:
+        # Po perkrovimo (ar nulūžus darbininkui) pateikiami eilėje laukiantys ir našlaičiais
+        # likę darbai; gyvo proceso vykdomi darbai neliečiami. Dvigubą vykdymą saugo _claim().
+        with self.app.app_context():
+            try:
+                jobs = TranslationJob.query.filter(
+                    TranslationJob.status.in_(["queued", "running"])
+                ).all()
+            except Exception as e:
+                print(f"⚠️ Nepavyko nuskaityti nebaigtų darbų: {e}")
+                return 0
+            ids = []
+            for job in jobs:
+                if job.status == "queued":
+                    ids.append(job.id)
+                elif self.is_orphaned(job):
+                    # Sąlyginis atnaujinimas: jei kitas procesas jau perėmė darbą, jo neliečiame
+                    requeued = (
+                        TranslationJob.query
+                        .filter_by(id=job.id, status="running", worker_id=job.worker_id)
+                        .update({"status": "queued", "done": 0}, synchronize_session=False)
+                    )
+                    if requeued:
+                        print(f"🔁 [job {job.id}] Našlaitis (vykdė {job.worker_id}) grąžinamas į eilę")
+                        ids.append(job.id)
+            db.session.commit()
+
+        for job_id in ids:
+            self.submit(job_id)
+        if ids:
+            print(f"🔁 Pateikti nebaigti dokumentų darbai: {len(ids)}")
+        return len(ids)
+
+    def _claim(self, job_id: str) -> bool:
+        # Atomiškai queued → running, kad to paties darbo nevykdytų du darbininkai
+        now = datetime.utcnow()
+        claimed = (
+            TranslationJob.query
+            .filter_by(id=job_id, status="queued")
+            .update({
+                "status": "running", "started_at": now, "heartbeat_at": now,
+                "worker_id": self.worker_id(), "done": 0,
+            })
+        )
+        db.session.commit()
+        return claimed == 1
+
+    def _run(self, job_id: str):
+        with self.app.app_context():
+            # Pažymima prieš perimant, kad resume_pending() tuo metu nelaikytų darbo našlaičiu
+            self._active.add(job_id)
+            if not self._claim(job_id):
+                self._active.discard(job_id)
+                return
+            try:
+                self._translate(job_id)
+            finally:
+                self._active.discard(job_id)
+
+    def _translate(self, job_id: str):
+        # Vykdoma app kontekste (_run)
+        job = TranslationJob.query.get(job_id)
+        print(f"📄 [job {job_id}] Pradedamas dokumento vertimas ({job.file_type})")
+
+        def progress(done: int, total: int):
+            job.done, job.total = done, total
+            job.heartbeat_at = datetime.utcnow()
+            db.session.commit()
+
+        def translate_batch(texts):
+            return self.svc.translate_batch(texts, job.source_lang, job.target_lang)
+
+        # Šio darbo TM pateikčių Future – prieš pažymint darbą baigtu laukiama tik jų
+        saves = []
+
+        def on_segments(segments):
+            # Nauji segmentai į TM įrašomi dalimis, kol dokumentas dar verčiamas
+            saves.append(self.svc.save_segments(
+                segments, job.source_lang, job.target_lang,
+                file_path=job.input_path, translated_path=job.output_path,
+                user_id=job.user_id
+            ))
+
+        try:
+            if job.file_type == "txt":
+                self.documents.translate_txt_file(
+                    job.input_path, job.output_path, translate_batch,
+                    progress=progress, on_segments=on_segments
+                )
+            else:
+                self.documents.translate_docx(
+                    job.input_path, job.output_path, translate_batch,
+                    progress=progress, on_segments=on_segments,
+                    chunk_size=Config.JOB_CHUNK_SIZE
+                )
+            saves.append(self.svc.save_translation(
+                original=None,
+                best=None,
+                all_outs={},
+                src=job.source_lang,
+                tgt=job.target_lang,
+                is_doc=True,
+                file_path=job.input_path,
+                translated_path=job.output_path,
+                user_id=job.user_id
+            ))
+
+            # Darbas pažymimas baigtu tik kai jo TM įrašai jau DB; neįrašytos eilutės – darbo klaida
+            if any(future is None for future in saves):
+                raise RuntimeError("Nepavyko perduoti TM įrašų įrašymui")
+            for future in saves:
+                try:
+                    future.result(timeout=Config.TM_SAVE_TIMEOUT_S)
+                except FutureTimeoutError:
+                    raise RuntimeError(
+                        f"TM įrašai neįrašyti per {Config.TM_SAVE_TIMEOUT_S:.0f} s"
+                    ) from None
+            job.status = "done"
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            print(f"✅ [job {job_id}] Baigta: {job.done}/{job.total}")
+
+        except Exception as e:
+            db.session.rollback()
+            job = TranslationJob.query.get(job_id)
+            job.status = "failed"
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            print(f"❌ [job {job_id}] Klaida: {e}")
+            traceback.print_exc()
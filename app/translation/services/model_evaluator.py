@@ -1,81 +1,88 @@
 # app/translation/services/model_evaluator.py
 
-from typing import Dict, Tuple, List
-from app.translation.services.evaluation.bleu import compute_sentence_bleu
+from typing import Dict, Tuple, List, Optional
+
+from config import Config
+from app.metrics.instruments import stage
+from app.translation.services.evaluation.batch import score_hypotheses
 from app.translation.services.evaluation.bert import compute_bert_f1
-from app.translation.services.evaluation.chrf import compute_sentence_chrf
+from app.translation.services.generation import translate_texts
+from app.translation.services.segmentation import normalize_segment
 
 
 def filter_models_by_direction(
     hf_models: Dict[str, dict],
     src_lang: str,
-    tgt_lang: str
+    tgt_lang: str,
+    limit: Optional[int] = None
 ) -> Dict[str, dict]:
     from app.translation.constants import HF_MODELS
 
     active = {}
     print(f"🔍 [model_evaluator] Filtruojama reverse kryptis: {src_lang} → {tgt_lang}")
-    for key, info in hf_models.items():
-        ax = HF_MODELS.get(key, {})
-        dirs = ax.get("directions", [])
-        for static_src, static_tgt in dirs:
+    # hf_models gali būti paprastas žodynas arba ModelRegistry – get() pakrauna tik reikalingus;
+    # su limit pirmenybė jau pakrautiems modeliams, kad nereikėtų krauti naujų
+    keys = sorted(HF_MODELS, key=lambda k: k not in hf_models) if limit else list(HF_MODELS)
+    for key in keys:
+        if limit and len(active) >= limit:
+            break
+        for static_src, static_tgt in HF_MODELS[key].get("directions", []):
             if static_src.split("_")[0] == src_lang and static_tgt.split("_")[0] == tgt_lang:
-                active[key] = info
+                info = hf_models.get(key)
+                if info is not None:
+                    active[key] = info
                 break
     print(f"🔍 [model_evaluator] Atrinkti reverse modeliai: {list(active.keys())}")
     return active
 
 
-def compute_back_translations(
-    fwd_translation: str,
+def compute_back_translations_batch(
+    fwd_translations: List[str],
     reverse_models: Dict[str, dict],
     source_lang: str,
     target_lang: str
-) -> List[str]:
-    back_translations: List[str] = []
-    print(f"🔄 [model_evaluator] Back-translation pradedama vieną kartą: '{fwd_translation[:30]}...'")
+) -> Dict[str, List[str]]:
+    # Surenkame unikalius kandidatus ir kiekvienam reverse modeliui paleidžiame vieną
+    # partijinį vertimą; rezultatai grąžinami pagal kandidato tekstą.
+    unique = list(dict.fromkeys(fwd_translations))
+    back_translations: Dict[str, List[str]] = {fwd: [] for fwd in unique}
+    print(
+        f"🔄 [model_evaluator] Back-translation: {len(unique)} unikalūs kandidatai "
+        f"(iš {len(fwd_translations)}) × {len(reverse_models)} reverse modeliai"
+    )
 
     for rev_name, rev_info in reverse_models.items():
-        rev_tok = rev_info["tokenizer"]
-        rev_model = rev_info["model"]
         print(f"🔄 [model_evaluator] Atgal verčiama per modelį: {rev_name}")
-
         try:
-            if rev_name.startswith("m2m100"):
-                rev_tok.src_lang = target_lang
-                encoded_bt = rev_tok(fwd_translation, return_tensors="pt")
-                bos_id_bt = rev_tok.get_lang_id(source_lang)
-                outs_bt = rev_model.generate(**encoded_bt, forced_bos_token_id=bos_id_bt)
-
-            elif rev_name.startswith("mbart"):
-                src_code_bt = f"{target_lang}_XX" if target_lang != "lt" else "lt_LT"
-                tgt_code_bt = f"{source_lang}_XX" if source_lang != "lt" else "lt_LT"
-                rev_tok.src_lang = src_code_bt
-                encoded_bt = rev_tok(fwd_translation, return_tensors="pt")
-                try:
-                    bos_id_bt = rev_tok.lang_code_to_id[tgt_code_bt]
-                except KeyError:
-                    print(f"⚠️ [model_evaluator] Modelis '{rev_name}' nepalaiko '{tgt_code_bt}', praleidžiu.")
-                    continue
-                outs_bt = rev_model.generate(**encoded_bt, forced_bos_token_id=bos_id_bt)
-
-            else:
-                encoded_bt = rev_tok(fwd_translation, return_tensors="pt", padding=True)
-                outs_bt = rev_model.generate(**encoded_bt)
-
+            with stage("back_translation", model=rev_name):
+                outs = translate_texts(rev_name, rev_info, unique, target_lang, source_lang)
+        except KeyError:
+            print(f"⚠️ [model_evaluator] Modelis '{rev_name}' nepalaiko kalbos '{source_lang}', praleidžiu.")
+            continue
         except Exception as exc:
             print(f"⚠️ [model_evaluator] Klaida vertime '{rev_name}': {exc}. Praleidžiu šį modelį.")
             continue
 
-        back_text = rev_tok.batch_decode(outs_bt, skip_special_tokens=True)[0]
-        print(f"🔄 [model_evaluator] Back-text: '{back_text[:30]}...'")
-        back_translations.append(back_text)
+        for fwd, back_text in zip(unique, outs):
+            print(f"🔄 [model_evaluator] Back-text: '{back_text[:30]}...'")
+            back_translations[fwd].append(back_text)
 
-    if not back_translations:
-        print("⚠️ [model_evaluator] Nėra reverse modelių arba nepavyko versti atgal, grąžinu tuščią sąrašą.")
+    if not any(back_translations.values()):
+        print("⚠️ [model_evaluator] Nėra reverse modelių arba nepavyko versti atgal, grąžinu tuščius sąrašus.")
     return back_translations
 
 
+def compute_back_translations(
+    fwd_translation: str,
+    reverse_models: Dict[str, dict],
+    source_lang: str,
+    target_lang: str
+) -> List[str]:
+    return compute_back_translations_batch(
+        [fwd_translation], reverse_models, source_lang, target_lang
+    )[fwd_translation]
+
+
 def round_trip_bleu_per_candidate(
     back_translations: List[str],
     source_text: str
@@ -84,17 +91,39 @@ def round_trip_bleu_per_candidate(
         print("⚠️ [model_evaluator][BLEU] Nėra atgalinių tekstų, grąžinu BLEU=0")
         return 0.0
 
-    total_bleu = 0.0
-    for bt in back_translations:
-        bleu = compute_sentence_bleu(bt, source_text)
-        print(f"📏 [model_evaluator] BLEU bt vs source: {bleu:.2f}")
-        total_bleu += bleu
-
-    avg_bleu = total_bleu / len(back_translations)
+    scores = score_hypotheses(source_text, back_translations)["bleu"]
+    avg_bleu = sum(scores) / len(scores)
     print(f"📊 [model_evaluator] Vidutinis BLEU už kandidatą: {avg_bleu:.2f}")
     return avg_bleu
 
 
+def round_trip_metrics_batch(
+    back_translations: Dict[str, List[str]],
+    source_text: str
+) -> Dict[str, Dict[str, float]]:
+    # Visų kandidatų atgaliniai vertimai įvertinami vienu kvietimu: šaltinio n-gramų
+    # statistika skaičiuojama kartą, vienodi atgaliniai tekstai – taip pat tik kartą
+    hypotheses = [bt for bts in back_translations.values() for bt in bts]
+    scores = score_hypotheses(source_text, hypotheses)
+
+    averages: Dict[str, Dict[str, float]] = {}
+    pos = 0
+    for name, bts in back_translations.items():
+        n = len(bts)
+        bleu = scores["bleu"][pos:pos + n]
+        chrf = scores["chrf"][pos:pos + n]
+        pos += n
+        averages[name] = {
+            "bleu": sum(bleu) / n if n else 0.0,
+            "chrf": sum(chrf) / n if n else 0.0,
+        }
+        print(
+            f"📊 [model_evaluator] {name}: vidutinis BLEU={averages[name]['bleu']:.2f}, "
+            f"ChrF={averages[name]['chrf']:.2f}"
+        )
+    return averages
+
+
 def round_trip_bert_per_candidate(
     back_translations: List[str],
     source_text: str,
@@ -120,6 +149,33 @@ def round_trip_bert_per_candidate(
     return avg_f1
 
 
+def round_trip_bert_batch(
+    back_translations: Dict[str, List[str]],
+    source_text: str,
+    source_lang: str
+) -> Dict[str, float]:
+    # Visų kandidatų atgaliniai vertimai įvertinami vienu BERTScore kvietimu
+    hypotheses = [bt for bts in back_translations.values() for bt in bts]
+    if not hypotheses:
+        print("⚠️ [model_evaluator][BERT] Nėra atgalinių tekstų, grąžinu BERTScore=0")
+        return {name: 0.0 for name in back_translations}
+
+    try:
+        f1_scores = compute_bert_f1(hypotheses, [source_text] * len(hypotheses), lang=source_lang)
+    except Exception as e:
+        print(f"⚠️ [model_evaluator][BERT] BERTScore skaičiavimo klaida: {e}. Grąžinu 0.0")
+        return {name: 0.0 for name in back_translations}
+
+    averages: Dict[str, float] = {}
+    pos = 0
+    for name, bts in back_translations.items():
+        scores = f1_scores[pos:pos + len(bts)]
+        pos += len(bts)
+        averages[name] = sum(scores) / len(scores) if scores else 0.0
+        print(f"📊 [model_evaluator] Vidutinis BERT F1 už kandidatą {name}: {averages[name]:.4f}")
+    return averages
+
+
 def select_best_by_round_trip(
     candidates: Dict[str, str],
     hf_models: Dict[str, dict],
@@ -135,15 +191,14 @@ def select_best_by_round_trip(
         print(f"⚠️ [model_evaluator] Reverse modelių nėra, pasirenkamas ilgiausias: {best_model_name}")
         return candidates[best_model_name], best_model_name
 
+    back_by_text = compute_back_translations_batch(
+        list(candidates.values()), reverse_models, source_lang, target_lang
+    )
+
     bleu_scores: Dict[str, float] = {}
     for fwd_model_name, fwd_translation in candidates.items():
         print(f"🔍 [model_evaluator] Skaičiuoju BLEU už kandidatą: {fwd_model_name}")
-
-        back_texts = compute_back_translations(
-            fwd_translation, reverse_models, source_lang, target_lang
-        )
-
-        avg_bleu = round_trip_bleu_per_candidate(back_texts, source_text)
+        avg_bleu = round_trip_bleu_per_candidate(back_by_text[fwd_translation], source_text)
         bleu_scores[fwd_model_name] = avg_bleu
 
     best_model_name = max(bleu_scores, key=bleu_scores.get)
@@ -157,55 +212,95 @@ def select_best_by_hybrid(
     source_text: str,
     source_lang: str,
     target_lang: str,
-    weight_bleu: float = 0.5
+    weight_bleu: float = 0.5,
+    mode: Optional[str] = None,
+    details: Optional[dict] = None
 ) -> Tuple[str, str]:
-    print(f"🔍 [model_evaluator] Pradedama hibridinio geriausio modelio paieška (BLEU+BERT+ChrF)...")
-    reverse_models = filter_models_by_direction(hf_models, target_lang, source_lang)
+    # mode="full" – visi reverse modeliai ir visos metrikos kiekvienam kandidatui;
+    # mode="adaptive" – sutarimas → BLEU/ChrF → BERTScore tik kai lyderiai arti vienas kito.
+    # details (jei perduotas) užpildomas pasirinktu keliu ir kiekvieno modelio balais.
+    mode = mode or Config.SCORING_MODE
+    if details is None:
+        details = {}
+    details.update(path=None, scores={}, reverse_models=[])
+
+    if mode == "adaptive":
+        # 1. Sutarimas: visi kandidatai (po tarpų normalizavimo) vienodi – vertinti nėra ko
+        if len(set(normalize_segment(c) for c in candidates.values())) <= 1:
+            best_model_name = next(iter(candidates))
+            details["path"] = "consensus"
+            print(f"⚡ [model_evaluator] Kandidatai sutampa, vertinimas praleistas: {best_model_name}")
+            return candidates[best_model_name], best_model_name
+
+    print(f"🔍 [model_evaluator] Pradedama hibridinio geriausio modelio paieška (BLEU+BERT+ChrF, {mode})...")
+    limit = 1 if mode == "adaptive" and Config.SCORING_SINGLE_REVERSE else None
+    reverse_models = filter_models_by_direction(hf_models, target_lang, source_lang, limit=limit)
+    details["reverse_models"] = list(reverse_models)
 
     if not reverse_models:
         best_model_name = max(candidates, key=lambda m: len(candidates[m]))
+        details["path"] = "longest"
         print(f"⚠️ [model_evaluator] Reverse modelių nėra, pasirenkamas ilgiausias: {best_model_name}")
         return candidates[best_model_name], best_model_name
 
-    scores_hybrid: Dict[str, float] = {}
-    bleu_scores: Dict[str, float] = {}
-    bert_scores: Dict[str, float] = {}
-    chrf_scores: Dict[str, float] = {}
-
-    for mdl_name, fwd_translation in candidates.items():
-        print(f"🔍 [model_evaluator] Skaičiuoju BLEU, BERT ir ChrF už kandidatą: {mdl_name}")
+    weight_bert = 0.3
+    weight_chrf = 0.2
 
-        back_texts = compute_back_translations(
-            fwd_translation, reverse_models, source_lang, target_lang
+    back_by_text = compute_back_translations_batch(
+        list(candidates.values()), reverse_models, source_lang, target_lang
+    )
+    back_by_model: Dict[str, List[str]] = {
+        mdl_name: back_by_text[fwd_translation]
+        for mdl_name, fwd_translation in candidates.items()
+    }
+
+    # 2. Pigios metrikos (BLEU, ChrF) visiems kandidatams
+    scores = details["scores"]
+    # (BLEU ir ChrF matuojami atskirais etapais score_hypotheses() viduje)
+    cheap_by_model = round_trip_metrics_batch(back_by_model, source_text)
+    for mdl_name, cheap in cheap_by_model.items():
+        scores[mdl_name] = {"bleu": cheap["bleu"], "chrf": cheap["chrf"], "bert": None}
+
+    contenders = list(back_by_model)
+    if mode == "adaptive" and len(contenders) > 1:
+        # 3. BERTScore skaičiuojamas tik kandidatams, kurie pagal BLEU/ChrF yra
+        #    ne toliau nei SCORING_BERT_MARGIN nuo lyderio
+        cheap = {
+            name: (weight_bleu * sc["bleu"] + weight_chrf * sc["chrf"]) / (weight_bleu + weight_chrf)
+            for name, sc in scores.items()
+        }
+        top = max(cheap.values())
+        contenders = [name for name, val in cheap.items() if top - val <= Config.SCORING_BERT_MARGIN]
+        if len(contenders) == 1:
+            best_model_name = contenders[0]
+            details["path"] = "cheap_metrics"
+            print(
+                f"🏆 [model_evaluator] Aiškus lyderis pagal BLEU/ChrF: {best_model_name} "
+                f"({cheap[best_model_name]:.2f}), BERTScore praleistas"
+            )
+            return candidates[best_model_name], best_model_name
+
+    details["path"] = "bert" if mode == "adaptive" else "full"
+    with stage("bertscore"):
+        bert_by_model = round_trip_bert_batch(
+            {name: back_by_model[name] for name in contenders}, source_text, source_lang
         )
 
-        avg_bleu = round_trip_bleu_per_candidate(back_texts, source_text)
-        bleu_scores[mdl_name] = avg_bleu
-
-        avg_f1 = round_trip_bert_per_candidate(back_texts, source_text, source_lang)
-        bert_scores[mdl_name] = avg_f1
-
-        total_chrf = 0.0
-        for bt in back_texts:
-            chrf_val = compute_sentence_chrf(bt, source_text)
-            print(f"📏 [model_evaluator] ChrF bt vs source: {chrf_val:.2f}")
-            total_chrf += chrf_val
-        avg_chrf = total_chrf / len(back_texts) if back_texts else 0.0
-        print(f"📊 [model_evaluator] Vidutinis ChrF už kandidatą: {avg_chrf:.2f}")
-        chrf_scores[mdl_name] = avg_chrf
-
-        weight_bert = 0.3
-        weight_chrf = 0.2
+    scores_hybrid: Dict[str, float] = {}
+    for mdl_name in contenders:
+        sc = scores[mdl_name]
+        sc["bert"] = bert_by_model[mdl_name]
         hybrid_score = (
-            weight_bleu * avg_bleu +
-            weight_bert * (avg_f1 * 100) +
-            weight_chrf * avg_chrf
+            weight_bleu * sc["bleu"] +
+            weight_bert * (sc["bert"] * 100) +
+            weight_chrf * sc["chrf"]
         )
+        sc["hybrid"] = hybrid_score
         scores_hybrid[mdl_name] = hybrid_score
 
         print(
             f"🔢 [model_evaluator] Modelis {mdl_name}: "
-            f"BLEU={avg_bleu:.2f}, BERT_F1={avg_f1:.4f}, ChrF={avg_chrf:.2f}, "
+            f"BLEU={sc['bleu']:.2f}, BERT_F1={sc['bert']:.4f}, ChrF={sc['chrf']:.2f}, "
             f"HIBRID={hybrid_score:.2f}"
         )
 
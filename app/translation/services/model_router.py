@@ -0,0 +1,137 @@
+# app/translation/services/model_router.py
+
+import random
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from sqlalchemy import case, func
+
+from app import db
+from app.database.models import ModelScore
+from app.translation.constants import HF_MODELS
+from app.translation.services.segmentation import normalize_segment
+from app.metrics.instruments import stage
+from config import Config
+
+# Teksto ilgio grupės (žodžių skaičius): (viršutinė riba, pavadinimas)
+LENGTH_BUCKETS = ((8, "short"), (30, "medium"))
+
+
+def length_bucket(text: str) -> str:
+    words = len(text.split())
+    for limit, name in LENGTH_BUCKETS:
+        if words <= limit:
+            return name
+    return "long"
+
+
+def direction_keys(src: str, tgt: str) -> List[str]:
+    # Statiškai (be pakrovimo) nustato, kurie HF_MODELS palaiko kryptį
+    return [
+        key for key, ax in HF_MODELS.items()
+        if any(
+            s.split("_")[0] == src and t.split("_")[0] == tgt
+            for s, t in ax.get("directions", [])
+        )
+    ]
+
+
+class ModelRouter:
+    # Pagal ankstesnių užklausų laimėjimų dažnį (kryptis + ilgio grupė) parenka,
+    # kuriuos modelius leisti; ROUTER_EXPLORE_RATE dalis užklausų visada leidžia visus.
+
+    def __init__(self, writer=None):
+        # writer – TMWriteBehind; be jo balai įrašomi sinchroniškai
+        self.writer = writer
+        self._stats: Dict[Tuple[str, str, str], Tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+
+    def win_stats(self, src: str, tgt: str, bucket: str) -> Dict[str, Tuple[int, int]]:
+        # {model_key: (paleidimai, laimėjimai)}; kešuojama ROUTER_REFRESH_S sekundžių
+        key = (src, tgt, bucket)
+        with self._lock:
+            cached = self._stats.get(key)
+            if cached and time.time() - cached[0] < Config.ROUTER_REFRESH_S:
+                return cached[1]
+
+        rows = (
+            db.session.query(
+                ModelScore.model_key,
+                func.count(ModelScore.id),
+                func.sum(case((ModelScore.is_winner, 1), else_=0)),
+            )
+            .filter_by(source_lang=src, target_lang=tgt, length_bucket=bucket, full_run=True)
+            .group_by(ModelScore.model_key)
+            .all()
+        )
+        stats = {model_key: (int(runs), int(wins or 0)) for model_key, runs, wins in rows}
+        with self._lock:
+            self._stats[key] = (time.time(), stats)
+        return stats
+
+    def choose(self, src: str, tgt: str, text: str, keys: List[str]) -> Tuple[List[str], str]:
+        # Grąžina (modelių raktai, priežastis): all / explore / warmup / routed
+        if not Config.ROUTER_ENABLED or len(keys) < 2:
+            return keys, "all"
+        if random.random() < Config.ROUTER_EXPLORE_RATE:
+            return keys, "explore"
+
+        try:
+            stats = self.win_stats(src, tgt, length_bucket(text))
+        except Exception as e:
+            print(f"⚠️ [router] Statistikos nuskaityti nepavyko: {e}")
+            return keys, "all"
+
+        # Kol kiekvienas modelis neturi pakankamai istorijos, leidžiami visi
+        if any(stats.get(key, (0, 0))[0] < Config.ROUTER_MIN_SAMPLES for key in keys):
+            return keys, "warmup"
+
+        rates = {key: stats[key][1] / stats[key][0] for key in keys}
+        chosen = [key for key in keys if rates[key] >= Config.ROUTER_MIN_WIN_RATE]
+        if not chosen:
+            chosen = [max(rates, key=rates.get)]
+        if len(chosen) == len(keys):
+            return keys, "all"
+
+        print(
+            f"🧭 [router] {src}→{tgt} ({length_bucket(text)}): leidžiami {chosen}, "
+            f"praleidžiami {[k for k in keys if k not in chosen]}"
+        )
+        return chosen, "routed"
+
+    def record(self, src: str, tgt: str, outcomes: list):
+        # outcomes: [(tekstas, kandidatai, geriausias vertimas, vertinimo details, full_run)]
+        rows = []
+        for text, candidates, best, details, full_run in outcomes:
+            best_norm = normalize_segment(best)
+            scores = details.get("scores") or {}
+            bucket = length_bucket(text)
+            for model_key, translation in candidates.items():
+                sc = scores.get(model_key) or {}
+                rows.append(ModelScore(
+                    source_lang=src,
+                    target_lang=tgt,
+                    length_bucket=bucket,
+                    model_key=model_key,
+                    path=details.get("path"),
+                    bleu=sc.get("bleu"),
+                    chrf=sc.get("chrf"),
+                    bert=sc.get("bert"),
+                    hybrid=sc.get("hybrid"),
+                    # Laimi kiekvienas modelis, kurio vertimas sutampa su pasirinktu (pvz. sutarimo atveju)
+                    is_winner=normalize_segment(translation) == best_norm,
+                    full_run=full_run,
+                ))
+        if not rows:
+            return
+        if self.writer is not None:
+            self.writer.submit(rows)
+            return
+        try:
+            with stage("score_save"):
+                db.session.add_all(rows)
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ [router] Modelių balų įrašyti nepavyko: {e}")
@@ -0,0 +1,112 @@
+# app/translation/services/scheduler.py
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+from app.metrics.instruments import metrics, stage
+from app.translation.services.generation import generate_texts
+
+
+BATCH_SIZE = metrics.histogram(
+    "translation_microbatch_size", "Segmentų skaičius vienoje mikro-partijoje",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+
+class _Pending:
+    __slots__ = ("text", "info", "future")
+
+    def __init__(self, text: str, info: dict):
+        self.text = text
+        self.info = info
+        self.future = Future()
+
+
+class MicroBatcher:
+    # Sujungia kelių lygiagrečių užklausų segmentus į vieną generate() partiją:
+    # kiekvienai (modelis, kryptis) porai – eilė ir darbininko gija, kuri laukia iki
+    # wait_ms nuo pirmo segmento arba kol susirenka max_size segmentų.
+
+    def __init__(self, wait_ms: Optional[float] = None, max_size: Optional[int] = None):
+        self.wait = (wait_ms if wait_ms is not None else Config.MICROBATCH_WAIT_MS) / 1000.0
+        self.max_size = max_size or Config.MICROBATCH_MAX_SIZE
+        self._queues: Dict[Tuple[str, str, str], queue.Queue] = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _queue_for(self, key: Tuple[str, str, str]) -> queue.Queue:
+        with self._lock:
+            # Po fork() tėvo gijos vaike neegzistuoja – eiles ir darbininkus kuriame iš naujo
+            if self._pid != os.getpid():
+                self._queues = {}
+                self._pid = os.getpid()
+            q = self._queues.get(key)
+            if q is None:
+                q = queue.Queue()
+                self._queues[key] = q
+                threading.Thread(
+                    target=self._worker, args=(key, q),
+                    name=f"microbatch-{key[0]}-{key[1]}-{key[2]}", daemon=True
+                ).start()
+            return q
+
+    def generate(
+        self,
+        model_key: str,
+        info: dict,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str
+    ) -> List[str]:
+        # Tas pats parašas kaip generate_texts(), todėl tinka translate_texts(generate=...)
+        q = self._queue_for((model_key, source_lang, target_lang))
+        pending: Dict[str, _Pending] = {}
+        for text in texts:
+            if text.strip() and text not in pending:
+                pending[text] = _Pending(text, info)
+                q.put(pending[text])
+        return [pending[t].future.result() if t in pending else "" for t in texts]
+
+    def _worker(self, key: Tuple[str, str, str], q: queue.Queue):
+        while True:
+            batch = [q.get()]
+            deadline = time.monotonic() + self.wait
+            while len(batch) < self.max_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(q.get(timeout=remaining) if remaining > 0 else q.get_nowait())
+                except queue.Empty:
+                    break
+            self._run(key, batch)
+
+    def _run(self, key: Tuple[str, str, str], batch: List[_Pending]):
+        model_key, source_lang, target_lang = key
+        # Modelis galėjo būti iškeltas ir pakrautas iš naujo – grupuojame pagal konkretų egzempliorių
+        groups: Dict[int, List[_Pending]] = {}
+        for item in batch:
+            groups.setdefault(id(item.info), []).append(item)
+
+        for items in groups.values():
+            start = time.time()
+            BATCH_SIZE.observe(len(items), model=model_key)
+            try:
+                with stage("microbatch_generate", model=model_key):
+                    outs = generate_texts(
+                        model_key, items[0].info, [item.text for item in items],
+                        source_lang, target_lang, batch_size=self.max_size
+                    )
+            except Exception as e:
+                for item in items:
+                    item.future.set_exception(e)
+                continue
+            for item, out in zip(items, outs):
+                item.future.set_result(out)
+            print(
+                f"🧺 [batcher:{model_key} {source_lang}→{target_lang}] "
+                f"{len(items)} segm. per {time.time() - start:.2f} s"
+            )
@@ -0,0 +1,68 @@
+# app/translation/services/segmentation.py
+
+import re
+import unicodedata
+from typing import Iterator, List, TextIO, Tuple
+
+# Sakinio riba: tarpai po . ! ? … arba eilutės pabaiga (kartu su aplinkiniais tarpais)
+_BOUNDARY = re.compile(r"((?<=[.!?…])[ \t]+|[ \t]*\n\s*)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_segment(text: str) -> str:
+    # NFC + suvienodinti tarpai: naudojama TM paieškai (tikslus ir apytikslis atitikmuo)
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def split_sentences(text: str) -> Tuple[List[str], List[str]]:
+    # Grąžina (sakiniai, skirtukai), kad join_sentences atkurtų originalų išdėstymą.
+    parts = _BOUNDARY.split(text)
+    sentences = [parts[0]]
+    separators: List[str] = []
+
+    for sep, sentence in zip(parts[1::2], parts[2::2]):
+        first_alpha = next((ch for ch in sentence if ch.isalpha()), "")
+        # "pvz. tai" ar "Dr. jonas" – mažoji raidė po taško reiškia, kad sakinys nesibaigė
+        if "\n" not in sep and first_alpha.islower():
+            sentences[-1] += sep + sentence
+            continue
+        separators.append(sep)
+        sentences.append(sentence)
+
+    return sentences, separators
+
+
+def join_sentences(sentences: List[str], separators: List[str]) -> str:
+    if not sentences:
+        return ""
+    out = [sentences[0]]
+    for sep, sentence in zip(separators, sentences[1:]):
+        out.append(sep)
+        out.append(sentence)
+    return "".join(out)
+
+
+def iter_text_chunks(stream: TextIO, chunk_chars: int = 8192) -> Iterator[str]:
+    # Skaito tekstą dalimis ir kerpa ties paskutine sakinio riba, todėl atmintyje
+    # vienu metu laikoma tik ~chunk_chars simbolių. "".join(chunks) == originalas.
+    buffer = ""
+    while True:
+        block = stream.read(chunk_chars)
+        buffer += block
+        if not block:
+            if buffer:
+                yield buffer
+            return
+
+        cut = 0
+        for match in _BOUNDARY.finditer(buffer):
+            # Riba pačiame buferio gale gali tęstis kitame bloke – jos nenaudojame
+            if match.end() < len(buffer):
+                cut = match.end()
+        if not cut and len(buffer) >= 4 * chunk_chars:
+            # Ilgas tekstas be sakinio ribų – kerpame ties paskutiniu tarpu (arba bet kur)
+            cut = buffer.rfind(" ", 0, len(buffer) - 1) + 1 or len(buffer)
+
+        if cut:
+            yield buffer[:cut]
+            buffer = buffer[cut:]
@@ -0,0 +1,247 @@
+# app/translation/services/tm_exchange.py
+
+import csv
+import io
+import os
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from app import db
+from app.database.models import TMImport, TranslationMemory
+from app.translation.services.translation_memory import index_fuzzy, segment_hash
+
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+# Vienetas: (šaltinio tekstas, vertimas)
+Unit = Tuple[str, str]
+
+
+def _lang_matches(value: Optional[str], lang: str) -> bool:
+    # TMX kalbos kodai būna "lt", "lt-LT", "LT_lt" – lyginame pagrindinę dalį
+    return bool(value) and value.replace("_", "-").split("-")[0].lower() == lang.lower()
+
+
+def iter_tmx_units(path: str, source_lang: str, target_lang: str) -> Iterator[Unit]:
+    # Inkrementinis XML skaitymas: kiekvienas <tu> apdorojamas, išvalomas ir pašalinamas iš <body>,
+    # todėl atmintis nepriklauso nuo failo dydžio (root.clear() to nedaro: parseris toliau
+    # prikabina <tu> prie atkabinto <body>)
+    body = None
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            if elem.tag == "body":
+                body = elem
+            continue
+        if elem.tag != "tu":
+            continue
+        source = target = None
+        for tuv in elem.iter("tuv"):
+            lang = tuv.get(XML_LANG) or tuv.get("lang")
+            seg = tuv.find("seg")
+            text = "".join(seg.itertext()).strip() if seg is not None else ""
+            if _lang_matches(lang, source_lang) and source is None:
+                source = text
+            elif _lang_matches(lang, target_lang) and target is None:
+                target = text
+        elem.clear()
+        if body is not None:
+            body.remove(elem)
+        if source is not None and target is not None:
+            yield source, target
+        else:
+            # Vienetas be abiejų kalbų vis tiek skaičiuojamas (importo tęsimui reikia pastovios numeracijos)
+            yield "", ""
+
+
+def iter_csv_units(path: str) -> Iterator[Unit]:
+    # CSV su antrašte source,target (arba pirmi du stulpeliai)
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        lowered = [h.strip().lower() for h in header]
+        if "source" in lowered and "target" in lowered:
+            src_idx, tgt_idx = lowered.index("source"), lowered.index("target")
+        else:
+            src_idx, tgt_idx = 0, 1
+            yield (header[0], header[1]) if len(header) > 1 else ("", "")
+        for row in reader:
+            if len(row) > max(src_idx, tgt_idx):
+                yield row[src_idx].strip(), row[tgt_idx].strip()
+            else:
+                yield "", ""
+
+
+def _existing_hashes(hashes: list, source_lang: str, target_lang: str) -> set:
+    rows = (
+        db.session.query(TranslationMemory.source_hash)
+        .filter(
+            TranslationMemory.source_hash.in_(hashes),
+            TranslationMemory.source_lang == source_lang,
+            TranslationMemory.target_lang == target_lang,
+        )
+        .all()
+    )
+    return {h for (h,) in rows}
+
+
+def import_units(
+    units: Iterable[Unit],
+    state: TMImport,
+    chunk_size: int = 1000,
+    skip_existing: bool = True,
+    fuzzy: bool = True,
+    progress: Optional[Callable[[TMImport, float], None]] = None
+) -> TMImport:
+    # Įrašo vienetus dalimis: kiekviena dalis (TM eilutės + fuzzy juostos + state.processed)
+    # – viena transakcija. Jau apdoroti vienetai (state.processed) praleidžiami.
+    start = time.time()
+    resume_from = state.processed
+    chunk: list = []
+
+    def write(chunk: list, consumed: int):
+        if skip_existing:
+            # Praleidžiami jau esantys segmentai ir dalies viduje pasikartojantys šaltiniai
+            by_hash = {}
+            for source, target in chunk:
+                by_hash.setdefault(segment_hash(source), (source, target))
+            existing = _existing_hashes(list(by_hash), state.source_lang, state.target_lang)
+            rows = [(h, source, target) for h, (source, target) in by_hash.items() if h not in existing]
+        else:
+            # Be skip_existing įrašomas kiekvienas vienetas, kaip ir pateiktas faile
+            rows = [(segment_hash(source), source, target) for source, target in chunk]
+
+        records = [
+            TranslationMemory(
+                source_text=source,
+                source_hash=h,
+                translated_text=target,
+                source_lang=state.source_lang,
+                target_lang=state.target_lang,
+                is_document=False,
+                user_id=state.user_id,
+            )
+            for h, source, target in rows
+        ]
+        db.session.add_all(records)
+        db.session.flush()
+        if fuzzy:
+            index_fuzzy(records)
+        state.processed += consumed
+        state.inserted += len(records)
+        state.skipped += consumed - len(records)
+        state.updated_at = datetime.utcnow()
+        db.session.commit()
+        if progress:
+            progress(state, time.time() - start)
+
+    consumed = 0
+    for idx, (source, target) in enumerate(units):
+        if idx < resume_from:
+            continue
+        consumed += 1
+        if source and target:
+            chunk.append((source, target))
+        if consumed >= chunk_size:
+            write(chunk, consumed)
+            chunk, consumed = [], 0
+
+    if consumed:
+        write(chunk, consumed)
+    state.status = "done"
+    state.updated_at = datetime.utcnow()
+    db.session.commit()
+    return state
+
+
+def start_import(path: str, file_format: str, source_lang: str, target_lang: str,
+                 user_id: int, resume: bool = True) -> TMImport:
+    # Randa nebaigtą to paties failo (kelias + dydis + kryptis) importą arba sukuria naują
+    path = os.path.abspath(path)
+    size = os.path.getsize(path)
+    state = None
+    if resume:
+        state = (
+            TMImport.query
+            .filter_by(path=path, file_size=size, source_lang=source_lang,
+                       target_lang=target_lang, status="running")
+            .order_by(TMImport.id.desc())
+            .first()
+        )
+    if state is None:
+        state = TMImport(
+            path=path, file_size=size, file_format=file_format,
+            source_lang=source_lang, target_lang=target_lang, user_id=user_id,
+            status="running", processed=0, inserted=0, skipped=0,
+        )
+        db.session.add(state)
+        db.session.commit()
+    return state
+
+
+def iter_export_rows(source_lang: str, target_lang: str, chunk_size: int = 1000) -> Iterator[Unit]:
+    # Keyset skaitymas dalimis (id didėjimo tvarka) – atmintyje tik viena dalis
+    last_id = 0
+    while True:
+        rows = (
+            db.session.query(TranslationMemory.id, TranslationMemory.source_text, TranslationMemory.translated_text)
+            .filter(
+                TranslationMemory.id > last_id,
+                TranslationMemory.source_lang == source_lang,
+                TranslationMemory.target_lang == target_lang,
+                TranslationMemory.source_text.isnot(None),
+                TranslationMemory.translated_text.isnot(None),
+            )
+            .order_by(TranslationMemory.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
+        for _, source, target in rows:
+            yield source, target
+        last_id = rows[-1].id
+        # Ilgas eksportas neturi laikyti identity map / transakcijos
+        db.session.commit()
+
+
+def export_tmx(units: Iterable[Unit], source_lang: str, target_lang: str, flush_every: int = 500) -> Iterator[str]:
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<tmx version="1.4">\n'
+        f'  <header creationtool="Translation-system" creationtoolversion="1" datatype="plaintext" '
+        f'segtype="sentence" adminlang="en" srclang={quoteattr(source_lang)} o-tmf="tm"/>\n'
+        '  <body>\n'
+    )
+    buf = []
+    for source, target in units:
+        buf.append(
+            f'    <tu>\n'
+            f'      <tuv xml:lang={quoteattr(source_lang)}><seg>{escape(source)}</seg></tuv>\n'
+            f'      <tuv xml:lang={quoteattr(target_lang)}><seg>{escape(target)}</seg></tuv>\n'
+            f'    </tu>\n'
+        )
+        if len(buf) >= flush_every:
+            yield "".join(buf)
+            buf = []
+    if buf:
+        yield "".join(buf)
+    yield "  </body>\n</tmx>\n"
+
+
+def export_csv(units: Iterable[Unit], flush_every: int = 500) -> Iterator[str]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["source", "target"])
+    count = 0
+    for source, target in units:
+        writer.writerow([source, target])
+        count += 1
+        if count % flush_every == 0:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate(0)
+    yield out.getvalue()
@@ -0,0 +1,172 @@
+# app/translation/services/tm_writer.py
+
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional
+
+from sqlalchemy import Integer, inspect as sa_inspect
+
+from app import db
+from app.database.models import TranslationMemory
+from app.metrics.instruments import metrics, stage
+from app.translation.services.translation_memory import index_fuzzy
+from config import Config
+
+FLUSHED_ROWS = metrics.counter("tm_write_behind_rows_total", "Į DB įrašytos (result=ok) arba prarastos (failed) eilutės")
+FLUSH_SIZE = metrics.histogram(
+    "tm_write_behind_batch_size", "Eilučių skaičius viename write-behind įrašyme",
+    buckets=(1, 10, 50, 100, 200, 500, 1000, 5000)
+)
+
+_STOP = object()
+
+
+class TMWriteBehind:
+    # Write-behind eilė TM (ir kitiems) įrašams: užklausa tik įdeda ORM objektus į eilę,
+    # foninė gija juos įrašo viena transakcija kas max_rows eilučių arba max_delay_ms.
+    # Kiekviena pateiktis gauna Future, todėl kvietėjas gali laukti tik savo eilučių.
+    # Išjungus (TM_WRITE_BEHIND=0) arba be init_app() įrašoma sinchroniškai.
+
+    def __init__(self, max_rows: Optional[int] = None, max_delay_ms: Optional[float] = None,
+                 enabled: Optional[bool] = None):
+        self.max_rows = max_rows or Config.TM_FLUSH_ROWS
+        self.max_delay = (max_delay_ms if max_delay_ms is not None else Config.TM_FLUSH_MS) / 1000.0
+        self.enabled = Config.TM_WRITE_BEHIND if enabled is None else enabled
+        self.app = None
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["tm_writer"] = self
+        atexit.register(self.close)
+
+    def _ensure_worker(self):
+        with self._lock:
+            # Po fork() tėvo gija vaike neegzistuoja – paleidžiama iš naujo su nauja eile.
+            # Pasibaigusi gija (po close() ar netikėtos klaidos) paleidžiama iš naujo su ta pačia
+            # eile, kad jau pateikti įrašai nebūtų prarasti
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="tm-write-behind", daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def submit(self, records: List[db.Model]) -> Future:
+        # Grąžina šios pateikties Future: rezultatas – įrašytų eilučių skaičius,
+        # išimtis – jei bent viena jos eilutė neįrašyta
+        future: Future = Future()
+        if not records:
+            future.set_result(0)
+            return future
+        if not self.enabled or self.app is None:
+            self._write([(list(records), future)])
+            return future
+        self._ensure_worker()
+        self._queue.put((list(records), future))
+        return future
+
+    def _worker(self):
+        q = self._queue
+        stop = False
+        while not stop:
+            item = q.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            rows = len(item[0])
+            deadline = time.monotonic() + self.max_delay
+            while rows < self.max_rows:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = q.get(timeout=remaining) if remaining > 0 else q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+                rows += len(item[0])
+
+            try:
+                with self.app.app_context():
+                    self._write(batch)
+            except Exception as e:
+                # Klaida už _write() apsaugos ribų (pvz. rollback() ar app_context()) neturi
+                # nutraukti gijos – šios partijos pateiktys pažymimos nepavykusiomis
+                print(f"❌ [tm-writer] Partijos įrašymo klaida: {e}")
+                for recs, future in batch:
+                    if not future.done():
+                        FLUSHED_ROWS.inc(len(recs), result="failed")
+                        future.set_exception(e)
+
+    @staticmethod
+    def _reset_generated_keys(records: list):
+        # Po rollback() ORM objektai išlaiko flush metu gautus id; pakartotinai įrašant
+        # jie turi būti sugeneruoti iš naujo (kitaip PostgreSQL seka vėliau susidurtų)
+        for rec in records:
+            mapper = sa_inspect(rec).mapper
+            for column in mapper.primary_key:
+                if isinstance(column.type, Integer) and column.autoincrement in (True, "auto"):
+                    setattr(rec, mapper.get_property_by_column(column).key, None)
+
+    def _commit(self, records: list):
+        with stage("tm_flush"):
+            db.session.add_all(records)
+            db.session.flush()
+            index_fuzzy([r for r in records if isinstance(r, TranslationMemory)])
+            db.session.commit()
+
+    def _write(self, items: list):
+        # items: [(įrašai, Future)]; visi – viena transakcija. Jei ji nepavyksta, eilutės įrašomos
+        # po vieną, kad viena bloga eilutė neišmestų kitų vartotojų įrašų
+        records = [rec for recs, _ in items for rec in recs]
+        try:
+            self._commit(records)
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ [tm-writer] Partija iš {len(records)} eil. nepavyko ({e}), įrašoma po vieną")
+        else:
+            FLUSH_SIZE.observe(len(records))
+            FLUSHED_ROWS.inc(len(records), result="ok")
+            print(f"💾 [tm-writer] Į DB įrašyta {len(records)} eil. viena transakcija")
+            for recs, future in items:
+                future.set_result(len(recs))
+            return
+
+        self._reset_generated_keys(records)
+        for recs, future in items:
+            errors = []
+            for rec in recs:
+                try:
+                    self._commit([rec])
+                    FLUSHED_ROWS.inc(result="ok")
+                except Exception as e:
+                    db.session.rollback()
+                    self._reset_generated_keys([rec])
+                    FLUSHED_ROWS.inc(result="failed")
+                    errors.append(e)
+            if errors:
+                print(f"❌ [tm-writer] Nepavyko įrašyti {len(errors)} iš {len(recs)} eil.: {errors[0]}")
+                future.set_exception(RuntimeError(
+                    f"Nepavyko įrašyti {len(errors)} iš {len(recs)} eil.: {errors[0]}"
+                ))
+            else:
+                future.set_result(len(recs))
+
+    def close(self):
+        # Išjungiant procesą eilė ištuštinama, kad nebūtų prarasti įrašai
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout=30)
+        if self._thread.is_alive():
+            print("⚠️ [tm-writer] Eilė neištuštinta per 30 s")
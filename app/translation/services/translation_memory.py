@@ -0,0 +1,239 @@
+# app/translation/services/translation_memory.py
+
+import hashlib
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+
+from app import db
+from app.database.models import TranslationMemory, TMFuzzyBand, User
+from app.translation.services.fuzzy_index import band_keys, similarity
+from app.translation.services.segmentation import normalize_segment
+
+# Kandidato raktas, kai vertimas paimtas iš Translation Memory, o ne iš modelių
+TM_CANDIDATE_KEY = "translation_memory"
+
+
+def segment_hash(text: str) -> str:
+    return hashlib.sha1(normalize_segment(text).encode("utf-8")).hexdigest()
+
+
+def lookup_exact_many(texts: List[str], source_lang: str, target_lang: str) -> Dict[str, str]:
+    # Grąžina {tekstas: vertimas} tiems tekstams, kurie jau yra TM (naujausias įrašas laimi)
+    by_hash: Dict[str, List[str]] = {}
+    for text in texts:
+        if text and text.strip():
+            by_hash.setdefault(segment_hash(text), []).append(text)
+    if not by_hash:
+        return {}
+
+    rows = (
+        TranslationMemory.query
+        .with_entities(
+            TranslationMemory.source_hash,
+            TranslationMemory.source_text,
+            TranslationMemory.translated_text,
+        )
+        .filter(
+            TranslationMemory.source_hash.in_(list(by_hash)),
+            TranslationMemory.source_lang == source_lang,
+            TranslationMemory.target_lang == target_lang,
+            TranslationMemory.translated_text.isnot(None),
+        )
+        .order_by(TranslationMemory.id.desc())
+        .all()
+    )
+
+    hits: Dict[str, str] = {}
+    for row_hash, row_source, row_translation in rows:
+        for text in by_hash.get(row_hash, []):
+            # Apsauga nuo hash kolizijų: lyginame ir normalizuotą tekstą
+            if text not in hits and normalize_segment(row_source or "") == normalize_segment(text):
+                hits[text] = row_translation
+    return hits
+
+
+def lookup_exact(text: str, source_lang: str, target_lang: str) -> Optional[str]:
+    return lookup_exact_many([text], source_lang, target_lang).get(text)
+
+
+def backfill_source_hashes(chunk_size: int = 1000) -> int:
+    # Senesniems įrašams (be source_hash) apskaičiuojame hash dalimis
+    updated = 0
+    while True:
+        rows = (
+            TranslationMemory.query
+            .filter(
+                TranslationMemory.source_hash.is_(None),
+                TranslationMemory.source_text.isnot(None),
+            )
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
+        for row in rows:
+            row.source_hash = segment_hash(row.source_text)
+        db.session.commit()
+        updated += len(rows)
+
+    if updated:
+        print(f"🛠️ TM: apskaičiuoti {updated} senų įrašų hash'ai")
+    return updated
+
+
+def index_fuzzy(records: List[TranslationMemory]):
+    # Prideda naujų įrašų MinHash juostas į sesiją (commit daro kviečiantysis)
+    for rec in records:
+        if not rec.id or not rec.source_text or not rec.translated_text:
+            continue
+        for key in band_keys(rec.source_text, rec.source_lang, rec.target_lang):
+            db.session.add(TMFuzzyBand(tm_id=rec.id, band_key=key))
+
+
+def lookup_fuzzy(
+    text: str,
+    source_lang: str,
+    target_lang: str,
+    threshold: float = 0.75,
+    top_k: int = 5,
+    max_candidates: int = 50,
+    user_id: Optional[int] = None
+) -> List[dict]:
+    # LSH: kandidatai – įrašai, turintys bent vieną bendrą juostą; daugiau bendrų juostų → panašesni.
+    # Tikslus panašumas skaičiuojamas tik max_candidates įrašams, todėl pilnas lentelės skenavimas nevyksta.
+    # user_id – ieškoti tik šio vartotojo įrašuose (None – visuose)
+    if not text or not text.strip():
+        return []
+
+    keys = band_keys(text, source_lang, target_lang)
+    hits = func.count(TMFuzzyBand.id)
+    query = db.session.query(TMFuzzyBand.tm_id, hits).filter(TMFuzzyBand.band_key.in_(keys))
+    if user_id is not None:
+        query = (
+            query.join(TranslationMemory, TranslationMemory.id == TMFuzzyBand.tm_id)
+            .filter(TranslationMemory.user_id == user_id)
+        )
+    candidate_ids = [
+        tm_id for tm_id, _ in (
+            query
+            .group_by(TMFuzzyBand.tm_id)
+            .order_by(hits.desc(), TMFuzzyBand.tm_id.desc())
+            .limit(max_candidates)
+            .all()
+        )
+    ]
+    if not candidate_ids:
+        return []
+
+    rows = (
+        TranslationMemory.query
+        .with_entities(
+            TranslationMemory.id,
+            TranslationMemory.source_text,
+            TranslationMemory.translated_text,
+        )
+        .filter(TranslationMemory.id.in_(candidate_ids))
+        .all()
+    )
+
+    matches: Dict[str, dict] = {}
+    for row_id, row_source, row_translation in rows:
+        score = similarity(text, row_source)
+        if score < threshold:
+            continue
+        key = normalize_segment(row_source)
+        # Tas pats šaltinis gali būti įrašytas kelis kartus – paliekame naujausią
+        if key not in matches or matches[key]["id"] < row_id:
+            matches[key] = {
+                "id": row_id,
+                "source_text": row_source,
+                "translated_text": row_translation,
+                "similarity": round(score, 4),
+            }
+
+    return sorted(matches.values(), key=lambda m: (-m["similarity"], -m["id"]))[:top_k]
+
+
+def rebuild_fuzzy_index(chunk_size: int = 1000) -> int:
+    # Indeksuoja įrašus, kurie dar neturi juostų (pvz. sukurti prieš fuzzy paiešką)
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = (
+            TranslationMemory.query
+            .outerjoin(TMFuzzyBand, TMFuzzyBand.tm_id == TranslationMemory.id)
+            .filter(
+                TranslationMemory.id > last_id,
+                TMFuzzyBand.id.is_(None),
+                TranslationMemory.source_text.isnot(None),
+                TranslationMemory.translated_text.isnot(None),
+            )
+            .order_by(TranslationMemory.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
+        index_fuzzy(rows)
+        db.session.commit()
+        indexed += len(rows)
+        last_id = rows[-1].id
+        print(f"🛠️ TM fuzzy indeksas: suindeksuota {indexed} įrašų")
+    return indexed
+
+
+def browse_memory(
+    filters: dict,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    limit: int = 50,
+    preview_chars: int = 200
+) -> dict:
+    # Keyset puslapiavimas pagal id (naujausi pirmi): kaina nepriklauso nuo lentelės dydžio.
+    # before – rodyti įrašus su id < before (kitas puslapis), after – id > after (ankstesnis).
+    # Ilgi tekstai neimami: tik pirmi preview_chars simbolių ir ilgis (pilnas tekstas – memory_detail).
+    tm = TranslationMemory
+    query = (
+        db.session.query(
+            tm.id, tm.source_lang, tm.target_lang, tm.is_document, tm.created_at,
+            tm.user_id, User.username,
+            func.substr(tm.source_text, 1, preview_chars).label("source_preview"),
+            func.substr(tm.translated_text, 1, preview_chars).label("translated_preview"),
+            func.length(tm.source_text).label("source_len"),
+            func.length(tm.translated_text).label("translated_len"),
+        )
+        .outerjoin(User, User.id == tm.user_id)
+    )
+
+    if filters.get("user_id"):
+        query = query.filter(tm.user_id == filters["user_id"])
+    if filters.get("source_lang"):
+        query = query.filter(tm.source_lang == filters["source_lang"])
+    if filters.get("target_lang"):
+        query = query.filter(tm.target_lang == filters["target_lang"])
+    if filters.get("is_document") is not None:
+        query = query.filter(tm.is_document == filters["is_document"])
+    if filters.get("date_from"):
+        query = query.filter(tm.created_at >= filters["date_from"])
+    if filters.get("date_to"):
+        query = query.filter(tm.created_at < filters["date_to"])
+
+    if after is not None:
+        rows = query.filter(tm.id > after).order_by(tm.id.asc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = list(reversed(rows[:limit]))
+        has_prev, has_next = has_more, True
+    else:
+        if before is not None:
+            query = query.filter(tm.id < before)
+        rows = query.order_by(tm.id.desc()).limit(limit + 1).all()
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        has_prev = before is not None
+
+    return {
+        "rows": rows,
+        "next_before": rows[-1].id if rows and has_next else None,
+        "prev_after": rows[0].id if rows and has_prev else None,
+    }
@@ -1,17 +1,20 @@
 import time
 import os
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from flask import current_app
 from flask_login import current_user
 
-from bert_score import BERTScorer
+from app.translation.services.evaluation.bert import get_bert_engine
 from huggingface_hub import snapshot_download
 
-# Importuojame vietinį HF modelių pakrovimą (snapshot + local_files_only)
-from app.ml_models.model_initializer import load_models
+# HF modelių registras (pakrovimas pagal poreikį + LRU RAM biudžetas)
+from app.ml_models.registry import ModelRegistry
 
 from app.database.models import TranslationMemory
-from app import db
-from app.translation.constants import HF_MODELS
+from config import Config
+from app.translation.constants import HF_MODELS, MBART_LANG_CODE
 from transformers import MBartForConditionalGeneration, MBart50TokenizerFast
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 import torch
@@ -19,12 +22,25 @@ import torch
 # Importuojame hibridinę atranką (BLEU + BERTScore)
 from app.translation.services.model_evaluator import select_best_by_hybrid
 
-# mBART kalbų žemėlapis
-MBART_LANG_CODE = {
-    "en": "en_XX",
-    "lt": "lt_LT",
-    # Galite pridėti ir kitas, jei prireiks
-}
+# Sakinių skaidymas ir partijinis (batched) generavimas
+from app.translation.services.generation import stream_text, translate_texts
+
+# Mikro-partijos: lygiagrečių užklausų segmentai sujungiami į bendras generate() partijas
+from app.translation.services.scheduler import MicroBatcher
+
+# Modelių maršrutizatorius pagal istorinį laimėjimų dažnį
+from app.translation.services.model_router import ModelRouter, direction_keys
+
+# Write-behind TM įrašymas (partijomis, viena transakcija)
+from app.translation.services.tm_writer import TMWriteBehind
+
+# Etapų trukmės (/metrics histogramos ir užklausos detalizacija)
+from app.metrics.instruments import STAGE_SECONDS, stage
+
+# Translation Memory: tikslaus atitikmens paieška prieš modelių darbą
+from app.translation.services.translation_memory import (
+    TM_CANDIDATE_KEY, lookup_exact_many, segment_hash
+)
 
 # Kietai užkoduoti folderiai dokumentams
 UPLOAD_FOLDER = r"E:\univerui\4_kursas\bakalauras\Test\Translation-system\instance\uploads"
@@ -39,11 +55,8 @@ def ensure_bert_model(
     print(f"🔄 Bandome įkrauti BERTScorer (model_type='{model_type}') lokaliai (be interneto)...")
     try:
         # 1) Bandome tiesiogiai – jeigu svoriai jau yra talpykloje (~/.cache/torch/transformers…), tai veiks.
-        scorer = BERTScorer(
-            lang=lang,
-            model_type=model_type,
-            rescale_with_baseline=True
-        )
+        #    Pakrautas BERTScorer lieka bendrame variklyje ir naudojamas vertinimui.
+        get_bert_engine().load()
         print(f"✅ BERTScorer '{model_type}' pakrautas iš lokalaus cache.")
         return
 
@@ -85,11 +98,7 @@ def ensure_bert_model(
 
     # 3) Po parsisiuntimo dar kartą bandome BERTScorer(lang, model_type)
     try:
-        scorer = BERTScorer(
-            lang=lang,
-            model_type=model_type,
-            rescale_with_baseline=True
-        )
+        get_bert_engine().load()
         print(f"✅ BERTScorer '{model_type}' sėkmingai pakrautas lokaliai po parsisiuntimo.")
         return
     except Exception as second_err:
@@ -104,107 +113,354 @@ def ensure_bert_model(
 
 class TranslationService:
     def __init__(self):
+        # 1. Modeliai (BERTScore ir HF) importo metu nekraunami – tai daro warm_up()
+        #    fone (start_warm_up) arba registras pirmos užklausos metu
+        self._warmup_lock = threading.Lock()
+        self._warmup_thread = None
+        self.warmup_state = {
+            "status": "pending",
+            "started_at": None,
+            "finished_at": None,
+            "bert": "pending",
+            "error": None,
+        }
+
+        # 2. HF modelių registras: modeliai kraunami pirmą kartą prireikus krypčiai,
+        #    laikomi MODEL_RAM_BUDGET_MB biudžete (LRU iškėlimas)
+        self.hf_models = ModelRegistry(budget_mb=Config.MODEL_RAM_BUDGET_MB)
+        print("✅ HF modelių registras paruoštas:", self.hf_models.known_keys())
+
+        # 3. Lygiagretaus generavimo gijų telkinys (MODEL_PARALLELISM > 1)
+        self._executor = None
+        parallelism = Config.MODEL_PARALLELISM
+        if parallelism > 1:
+            # torch intra-op gijų skaičius: set_num_threads() procese nustato bendrą ribą (ATen telkinys
+            # vienas visam procesui), o initializer jį pakartoja kiekvienoje generavimo gijoje – OpenMP
+            # build'uose gijų skaičius galioja kviečiančiai gijai, todėl kiekvienas lygiagretus
+            # modelis naudoja ne daugiau nei cpu / MODEL_PARALLELISM gijų
+            threads = Config.TORCH_THREADS_PER_MODEL or max(1, (os.cpu_count() or 1) // parallelism)
+            torch.set_num_threads(threads)
+            self._executor = ThreadPoolExecutor(
+                max_workers=parallelism,
+                thread_name_prefix="hf-generate",
+                initializer=torch.set_num_threads,
+                initargs=(threads,)
+            )
+            print(f"⚙️ Lygiagretus generavimas: {parallelism} gijos × {threads} torch gijos")
+
+        # 4. Mikro-partijų planuoklis bendram lygiagrečių užklausų generavimui
+        self.batcher = MicroBatcher() if Config.MICROBATCH_ENABLED else None
+        if self.batcher is not None:
+            print(
+                f"🧺 Mikro-partijos: laukimas {Config.MICROBATCH_WAIT_MS} ms, "
+                f"maks. {Config.MICROBATCH_MAX_SIZE} segm."
+            )
+
+        # 5. TM ir modelių balų įrašymas į DB fone partijomis (TM_WRITE_BEHIND);
+        #    gija paleidžiama po writer.init_app(app) create_app() metu
+        self.writer = TMWriteBehind()
+
+        # 6. Modelių maršrutizatorius (ROUTER_ENABLED) – praleidžia retai laiminčius modelius
+        self.router = ModelRouter(writer=self.writer)
+
+        # 7. Inicializuojame DocumentService, jei reikia dokumentų vertimo
+        from app.upload.services.document_service import DocumentService
+        self.doc_service = DocumentService()
+
+    def start_warm_up(self, keys: list = None):
+        # Paleidžia warm_up() foninėje gijoje (tik vieną kartą procesui)
+        with self._warmup_lock:
+            if self._warmup_thread is not None:
+                return self._warmup_thread
+            self._warmup_thread = threading.Thread(
+                target=self.warm_up, args=(keys,), name="model-warmup", daemon=True
+            )
+            self._warmup_thread.start()
+            return self._warmup_thread
+
+    def warm_up(self, keys: list = None):
+        keys = keys or Config.WARMUP_MODELS or self.hf_models.known_keys()
+        self.warmup_state.update(status="running", started_at=time.time())
+        print(f"🔥 Modelių įšildymas: BERTScore + {keys}")
+
         try:
             ensure_bert_model(
                 lang="lt",
-                model_type="xlm-roberta-base"
+                model_type=Config.BERT_MODEL_TYPE
             )
+            self.warmup_state["bert"] = "ready"
         except RuntimeError as e:
             # Jei nepavyksta, mes toliau tęsiame be BERTScore (tik BLEU režimu)
+            self.warmup_state["bert"] = "failed"
             print(f"⚠️ BERT modelio tikrinimas nepavyko: {e}")
             print("   Tęsiu be BERTScore – hibridinis vertinimas remsis vien BLEU")
 
-        # 2. Įkrauname HF modelius (kiti vertimai)
         try:
-            self.hf_models = load_models()
-        except RuntimeError as e:
-            print(f"❌ HF modelių pakrovimo klaida: {e}")
-            raise
+            for key in keys:
+                self.hf_models.get(key)
+        except Exception as e:
+            self.warmup_state.update(status="failed", error=str(e))
+            print(f"❌ Modelių įšildymo klaida: {e}")
+            return
+
+        self.warmup_state.update(status="done", finished_at=time.time())
+        duration = self.warmup_state["finished_at"] - self.warmup_state["started_at"]
+        print(f"✅ Modelių įšildymas baigtas per {duration:.1f} s: {self.hf_models.keys()}")
+
+    def readiness(self) -> dict:
+        # Pasiruošęs, kai įšildymas baigtas ir kiekvienai palaikomai krypčiai yra bent vienas modelis
+        status = self.hf_models.status()
+        directions = {}
+        for key, ax in HF_MODELS.items():
+            for src, tgt in ax.get("directions", []):
+                direction = f"{src.split('_')[0]}-{tgt.split('_')[0]}"
+                resident = status["models"][key]["state"] == "resident"
+                directions[direction] = directions.get(direction, False) or resident
+
+        ready = self.warmup_state["status"] == "done" and all(directions.values())
+        return {
+            "ready": ready,
+            "warmup": dict(self.warmup_state),
+            "directions": directions,
+            "models": status["models"],
+            "resident_mb": status["resident_mb"],
+        }
+
+    def translate_text(self, text: str, source_lang: str, target_lang: str, details: dict = None):
+        batch_details = [{}]
+        best_translation, candidates = self.translate_batch(
+            [text], source_lang, target_lang, details=batch_details
+        )[0]
+        if details is not None:
+            details.update(batch_details[0])
+        return best_translation, candidates
 
-        print("✅ HF modeliai sėkmingai įkrauti:", list(self.hf_models.keys()))
+    def translate_batch(self, texts: list[str], source_lang: str, target_lang: str, details: list = None):
+        # details – (nebūtinas) žodynų sąrašas po vieną kiekvienam tekstui; į jį įrašomas
+        # vertinimo kelias ir modelių balai
+
+        print(f"🔄 Pradedamas vertimas: {len(texts)} tekst. ({source_lang} → {target_lang})")
+        results: list = [None] * len(texts)
+
+        # 0. Tikslus atitikmuo Translation Memory – grąžinamas be jokio modelių darbo
+        tm_hits = self.lookup_memory(texts, source_lang, target_lang)
+        pending: dict[str, list[int]] = {}
+        for idx, text in enumerate(texts):
+            if not text.strip():
+                results[idx] = (text, {})
+            elif text in tm_hits:
+                results[idx] = (tm_hits[text], {TM_CANDIDATE_KEY: tm_hits[text]})
+                if details is not None:
+                    details[idx].update(path=TM_CANDIDATE_KEY)
+            else:
+                # Vienodi tekstai verčiami ir vertinami tik kartą
+                pending.setdefault(text, []).append(idx)
 
-        # 3. Inicializuojame DocumentService, jei reikia dokumentų vertimo
-        from app.upload.services.document_service import DocumentService
-        self.doc_service = DocumentService()
+        if not pending:
+            return results
 
-    def translate_text(self, text: str, source_lang: str, target_lang: str):
+        # 1. Maršrutizatorius pagal krypties, ilgio grupės ir laimėjimų istoriją
+        #    kiekvienam tekstui parenka modelių poaibį; tekstai su tuo pačiu poaibiu verčiami kartu
+        all_keys = direction_keys(source_lang, target_lang)
+        if not all_keys:
+            raise ValueError(
+                f"Nėra HF modelių palaikančių kryptį: {source_lang}→{target_lang}"
+            )
+        #    (priežastis – all / explore / warmup / routed – saugoma kiekvienam tekstui atskirai,
+        #    kad vienodas modelių poaibis nebūtų verčiamas keliais praėjimais)
+        groups: dict[tuple, list[str]] = {}
+        reasons: dict[str, str] = {}
+        for text in pending:
+            keys, reasons[text] = self.router.choose(source_lang, target_lang, text, all_keys)
+            groups.setdefault(tuple(keys), []).append(text)
+
+        outcomes = []
+        for keys, group_texts in groups.items():
+            active_hf_models = self.filter_models_by_direction(source_lang, target_lang, keys=list(keys))
+            if not active_hf_models:
+                raise ValueError(
+                    f"Nėra HF modelių palaikančių kryptį: {source_lang}→{target_lang}"
+                )
+            print(f"🔎 Atrinkti forward‐vertimo modeliai ({len(group_texts)} tekst.):", list(active_hf_models.keys()))
+            full_run = len(active_hf_models) == len(all_keys)
 
-        print(f"🔄 Pradedamas vertimas: '{text}' ({source_lang} → {target_lang})")
+            # 2. Forward vertimas: tekstai skaidomi į sakinius, kiekvienas modelis verčia partijomis
+            per_model = self.run_models(
+                active_hf_models, group_texts, source_lang, target_lang
+            )
 
-        # 1. Filtruojame HF modelius pagal source_lang→target_lang
-        active_hf_models = self.filter_models_by_direction(source_lang, target_lang)
+            # 3. Kiekvienam tekstui pasirenkame geriausią vertimą pagal hibridinį BLEU + BERTScore
+            for pos, text in enumerate(group_texts):
+                candidates = {key: outs[pos] for key, outs in per_model.items()}
+                print("📦 Visi forward‐vertimo kandidatai:", candidates)
+                scoring = {"routing": reasons[text]}
+                best_translation = self.select_best(
+                    text, candidates, source_lang, target_lang, details=scoring
+                )
+                outcomes.append((text, candidates, best_translation, scoring, full_run))
+                for idx in pending[text]:
+                    results[idx] = (best_translation, candidates)
+                    if details is not None:
+                        details[idx].update(scoring)
+
+        # 4. Modelių balai ir laimėtojas saugomi maršrutizatoriaus statistikai
+        self.router.record(source_lang, target_lang, outcomes)
+        return results
+
+    def fastest_model(self, keys: list) -> str:
+        # Greičiausias modelis pagal vidutinę generate etapo trukmę (/metrics histograma);
+        # be istorijos – pirmasis iš STREAM_PREFERRED_MODELS
+        means = {key: STAGE_SECONDS.mean(stage="generate", model=key) for key in keys}
+        known = {key: mean for key, mean in means.items() if mean is not None}
+        if len(known) == len(keys):
+            return min(known, key=known.get)
+        return next((key for key in Config.STREAM_PREFERRED_MODELS if key in keys), keys[0])
+
+    def translate_stream(self, text: str, source_lang: str, target_lang: str, details: dict = None):
+        # Generatorius (įvykis, duomenys): greičiausio modelio vertimo dalys ("token"),
+        # kiekvieno modelio kandidatas ("candidate") ir hibridinis pasirinkimas ("final")
+        details = details if details is not None else {}
+
+        if not text.strip():
+            yield "final", {"translation": text, "model": None, "candidates": {}, "scoring": details}
+            return
+
+        tm_hits = self.lookup_memory([text], source_lang, target_lang)
+        if text in tm_hits:
+            details.update(path=TM_CANDIDATE_KEY)
+            candidates = {TM_CANDIDATE_KEY: tm_hits[text]}
+            yield "candidate", {"model": TM_CANDIDATE_KEY, "translation": tm_hits[text]}
+            yield "final", {"translation": tm_hits[text], "model": TM_CANDIDATE_KEY,
+                            "candidates": candidates, "scoring": details}
+            return
+
+        all_keys = direction_keys(source_lang, target_lang)
+        keys, reason = self.router.choose(source_lang, target_lang, text, all_keys) if all_keys else ([], "all")
+        active_hf_models = self.filter_models_by_direction(source_lang, target_lang, keys=keys)
         if not active_hf_models:
             raise ValueError(
                 f"Nėra HF modelių palaikančių kryptį: {source_lang}→{target_lang}"
             )
-        print("🔎 Atrinkti forward‐vertimo modeliai:", list(active_hf_models.keys()))
 
-        # 2. Atlikti forward vertimą per kiekvieną modelį
-        candidates: dict[str, str] = {}
-        for key, info in active_hf_models.items():
-            tok = info["tokenizer"]
-            model = info["model"]
-            print(f"📝 [HF:{key}] Pradedamas vertimas...")
-            start = time.time()
-
-            if key.startswith("m2m100"):
-                tok.src_lang = source_lang
-                encoded = tok(text, return_tensors="pt")
-                bos_id = tok.get_lang_id(target_lang)
-                outs = model.generate(
-                    **encoded,
-                    forced_bos_token_id=bos_id
-                )
+        fast_key = self.fastest_model(list(active_hf_models))
+        others = {key: info for key, info in active_hf_models.items() if key != fast_key}
+        print(f"📡 [stream] Srautu verčia {fast_key}, kiti modeliai: {list(others)}")
+
+        # Kiti modeliai (jei MODEL_PARALLELISM > 1) verčia lygiagrečiai, kol srautu grąžinamas greičiausias
+        futures = {}
+        if self._executor is not None:
+            futures = {
+                self._executor.submit(
+                    contextvars.copy_context().run, self.run_models, {key: info}, [text], source_lang, target_lang
+                ): key
+                for key, info in others.items()
+            }
+
+        pieces = []
+        start = time.perf_counter()
+        with stage("stream_generate", model=fast_key):
+            for piece in stream_text(fast_key, active_hf_models[fast_key], text, source_lang, target_lang):
+                if not pieces:
+                    STAGE_SECONDS.observe(time.perf_counter() - start, stage="first_token", model=fast_key)
+                pieces.append(piece)
+                yield "token", {"model": fast_key, "text": piece}
+
+        candidates = {fast_key: "".join(pieces)}
+        yield "candidate", {"model": fast_key, "translation": candidates[fast_key]}
+
+        if futures:
+            for fut in as_completed(futures):
+                key = futures[fut]
+                candidates[key] = fut.result()[key][0]
+                yield "candidate", {"model": key, "translation": candidates[key]}
+        else:
+            for key, info in others.items():
+                candidates[key] = self.run_models({key: info}, [text], source_lang, target_lang)[key][0]
+                yield "candidate", {"model": key, "translation": candidates[key]}
+
+        scoring = {"routing": reason}
+        best_translation = self.select_best(text, candidates, source_lang, target_lang, details=scoring)
+        details.update(scoring)
+        self.router.record(
+            source_lang, target_lang,
+            [(text, candidates, best_translation, scoring, len(active_hf_models) == len(all_keys))]
+        )
+        yield "final", {"translation": best_translation, "model": scoring.get("best_model"),
+                        "candidates": candidates, "scoring": details}
 
-            elif key.startswith("mbart"):
-                if source_lang not in MBART_LANG_CODE or target_lang not in MBART_LANG_CODE:
-                    raise ValueError(
-                        f"mBART kodas nerastas kalbai: {source_lang} arba {target_lang}"
-                    )
-
-                src_code = MBART_LANG_CODE[source_lang]
-                tgt_code = MBART_LANG_CODE[target_lang]
-                tok.src_lang = src_code
-                encoded = tok(text, return_tensors="pt")
-                bos_id = tok.lang_code_to_id[tgt_code]
-                outs = model.generate(
-                    **encoded,
-                    forced_bos_token_id=bos_id
-                )
+    def lookup_memory(self, texts: list[str], source_lang: str, target_lang: str) -> dict:
+        if not Config.TM_EXACT_MATCH:
+            return {}
+        try:
+            with stage("tm_lookup"):
+                hits = lookup_exact_many(texts, source_lang, target_lang)
+        except Exception as e:
+            print(f"⚠️ TM paieška nepavyko, verčiama modeliais: {e}")
+            return {}
+        if hits:
+            print(f"⚡ TM: rasta {len(hits)} tikslių atitikmenų iš {len(texts)}")
+        return hits
 
-            else:
-                encoded = tok(text, return_tensors="pt", padding=True)
-                outs = model.generate(**encoded)
+    def run_models(self, active_hf_models: dict, texts: list[str], source_lang: str, target_lang: str) -> dict:
 
-            translation = tok.batch_decode(outs, skip_special_tokens=True)[0]
+        def run_one(key, info):
+            print(f"📝 [HF:{key}] Pradedamas vertimas...")
+            start = time.time()
+            with stage("generate", model=key):
+                outs = translate_texts(
+                    key, info, texts, source_lang, target_lang,
+                    generate=self.batcher.generate if self.batcher is not None else None
+                )
             duration = time.time() - start
-            print(
-                f"⌛ [HF:{key}] Vertimas baigtas per {duration:.2f} s → "
-                f"'{translation}'"
-            )
-            candidates[key] = translation
-
-        print("📦 Visi forward‐vertimo kandidatai:", candidates)
-
-        # 3. Pasirenkame geriausią vertimą pagal hibridinį BLEU + BERTScore
+            print(f"⌛ [HF:{key}] Vertimas baigtas per {duration:.2f} s")
+            return outs
+
+        if self._executor is None or len(active_hf_models) < 2:
+            return {key: run_one(key, info) for key, info in active_hf_models.items()}
+
+        # Lygiagretus režimas: kiekvieno modelio generate() vykdomas atskiroje gijoje,
+        # todėl užklausos trukmė artima lėčiausiam modeliui, o ne visų sumai
+        # (užklausos kontekstas perduodamas gijoms, kad etapų detalizacija jų neprarastų)
+        futures = {
+            key: self._executor.submit(contextvars.copy_context().run, run_one, key, info)
+            for key, info in active_hf_models.items()
+        }
+        return {key: fut.result() for key, fut in futures.items()}
+
+    def select_best(self, text: str, candidates: dict, source_lang: str, target_lang: str,
+                    details: dict = None) -> str:
+        details = details if details is not None else {}
         try:
-            best_translation, best_model_key = select_best_by_hybrid(
-                candidates,
-                self.hf_models,
-                text,
-                source_lang,
-                target_lang,
-                weight_bleu=0.5  # 50% BLEU, 50% BERTScore
-            )
-            print(f"🎖️ [Hibridinis] Pasirinktas modelis: {best_model_key}")
+            with stage("select_best"):
+                best_translation, best_model_key = select_best_by_hybrid(
+                    candidates,
+                    self.hf_models,
+                    text,
+                    source_lang,
+                    target_lang,
+                    weight_bleu=0.5,  # 50% BLEU, 50% BERTScore
+                    details=details
+                )
+            details["best_model"] = best_model_key
+            print(f"🎖️ [Hibridinis] Pasirinktas modelis: {best_model_key} (kelias: {details.get('path')})")
             print(f"🎯 [Hibridinis] Geriausias vertimas: '{best_translation}'")
         except Exception as e:
             # Jeigu BERT dalyje įvyko klaida, grąžiname ilgiausią vertimą (tik BLEU)
             print(f"❌ Klaida renkantis geriausią hibridinį modelį: {e}")
             best_translation = max(candidates.values(), key=len)
+            details.update(path="fallback_longest", error=str(e))
             print("⚠️ Pasirinktas atsarginis (ilgiausias) vertimas:", best_translation)
 
-        return best_translation, candidates
+        return best_translation
+
+    @staticmethod
+    def resolve_user_id(user_id: int = None) -> int:
+        # Foniniuose darbuose (be užklausos) vartotojas perduodamas aiškiai
+        if user_id is not None:
+            return user_id
+        if not current_user or not hasattr(current_user, "id"):
+            raise RuntimeError("Nepavyko nustatyti prisijungusio vartotojo.")
+        return current_user.id
 
     def save_translation(
         self,
@@ -215,7 +471,8 @@ class TranslationService:
         tgt: str,
         is_doc: bool = False,
         file_path: str = None,
-        translated_path: str = None
+        translated_path: str = None,
+        user_id: int = None
     ):
         
         print("💾 Pradedamas įrašas į DB...")
@@ -232,8 +489,7 @@ class TranslationService:
             f"🛠️ Saugojamas failas: {file_path}, Išverstas failas: {translated_path}"
         )
 
-        if not current_user or not hasattr(current_user, "id"):
-            raise RuntimeError("Nepavyko nustatyti prisijungusio vartotojo.")
+        user_id = self.resolve_user_id(user_id)
 
         file_path = os.path.join(UPLOAD_FOLDER, file_path) if file_path else None
         translated_path = os.path.join(TRANSLATED_FOLDER, translated_path) if translated_path else None
@@ -243,31 +499,67 @@ class TranslationService:
         try:
             rec = TranslationMemory(
                 source_text=original if not is_doc else None,
+                source_hash=segment_hash(original) if original and not is_doc else None,
                 translated_text=best if not is_doc else None,
                 source_lang=src,
                 target_lang=tgt,
                 is_document=is_doc,
                 file_path=file_path,
                 translated_path=translated_path,
-                user_id=current_user.id
+                user_id=user_id
             )
-            db.session.add(rec)
-            db.session.commit()
-            print("✅ Įrašas sėkmingai išsaugotas į DB!")
+            # Įrašas į DB atidedamas (write-behind): užklausa nelaukia commit/fsync;
+            # grąžinamas Future leidžia (pvz. dokumento darbui) palaukti būtent šio įrašo
+            with stage("tm_save"):
+                future = self.writer.submit([rec])
+            print("✅ Įrašas perduotas įrašymui į DB")
+            return future
         except Exception as e:
             print(f"❌ Klaida saugant įrašą į DB: {e}")
             current_app.logger.error(f"❌ Klaida saugant įrašą į DB: {e}")
+            return None
+
+    def save_segments(
+        self,
+        pairs: list,
+        src: str,
+        tgt: str,
+        file_path: str = None,
+        translated_path: str = None,
+        user_id: int = None,
+        is_doc: bool = True
+    ):
+        # Dokumento (arba partijinio API, is_doc=False) segmentai (šaltinis, vertimas) įrašomi kartu su kitais eilėje laukiančiais
+        # įrašais viena transakcija, kad pasikartojančios pastraipos vėliau būtų randamos TM
+        user_id = self.resolve_user_id(user_id)
+
+        try:
+            records = []
+            for original, best in pairs:
+                records.append(TranslationMemory(
+                    source_text=original,
+                    source_hash=segment_hash(original),
+                    translated_text=best,
+                    source_lang=src,
+                    target_lang=tgt,
+                    is_document=is_doc,
+                    file_path=file_path,
+                    translated_path=translated_path,
+                    user_id=user_id
+                ))
+            with stage("tm_save"):
+                future = self.writer.submit(records)
+            print(f"✅ {len(pairs)} dokumento segmentų perduota įrašymui į DB")
+            return future
+        except Exception as e:
+            print(f"❌ Klaida saugant segmentus į DB: {e}")
+            current_app.logger.error(f"❌ Klaida saugant segmentus į DB: {e}")
+            return None
 
-    def filter_models_by_direction(self, src: str, tgt: str) -> dict:
+    def filter_models_by_direction(self, src: str, tgt: str, keys: list = None) -> dict:
 
         current_app.logger.debug(f"🛠️ Filtruojama kryptis: {src} → {tgt}")
-        active_hf_models = {}
-        for model_key, model_info in self.hf_models.items():
-            static_dirs = HF_MODELS.get(model_key, {}).get("directions", [])
-            for static_src, static_tgt in static_dirs:
-                if static_src.split("_")[0] == src and static_tgt.split("_")[0] == tgt:
-                    active_hf_models[model_key] = model_info
-                    break
+        active_hf_models = self.hf_models.for_direction(src, tgt, keys=keys)
 
         print("🔍 Atrinkti modeliai dėl krypties:", list(active_hf_models.keys()))
         return active_hf_models
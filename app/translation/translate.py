@@ -1,13 +1,20 @@
 # app/translation/translate.py
 
 import os
+import json
 import uuid
-from flask import Blueprint, render_template, request, jsonify, current_app, send_file
-from docx import Document
+from flask import (
+    Blueprint, render_template, request, jsonify, current_app, send_file, url_for,
+    Response, stream_with_context
+)
 from app.translation.services.translation_service import TranslationService
-from flask_login import login_required
+from flask_login import login_required, current_user
 from app.upload.services.document_service import DocumentService
 from app.translation.constants import HF_MODELS
+from app.translation.services.job_service import JobService
+from app.database.models import TranslationJob
+from app.translation.services.translation_memory import TM_CANDIDATE_KEY, lookup_fuzzy
+from app.metrics.instruments import collect_stages, summarize_stages
 
 translation_bp = Blueprint("translation", __name__,
                            template_folder="templates",
@@ -18,6 +25,7 @@ TRANSLATED_FOLDER = r"E:\univerui\4_kursas\bakalauras\Test\Translation-system\in
 
 svc = TranslationService()
 document_service = DocumentService() 
+job_service = JobService(svc, document_service)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in current_app.config["ALLOWED_EXTENSIONS"]
@@ -37,30 +45,185 @@ def translate_api():
         data = request.json
         print(f"📥 Gauta užklausa su duomenimis: {data}")
         src, tgt = data["direction"].split("-")
-        best, candidates = svc.translate_text(data["text"], src, tgt)
+        scoring = {}
+        with collect_stages() as timings:
+            best, candidates = svc.translate_text(data["text"], src, tgt, details=scoring)
 
-        svc.save_translation(
-            original=data["text"],
-            best=best,
-            all_outs=candidates,
-            src=src,
-            tgt=tgt,
-            is_doc=False
-        )
+            # TM atitikmuo jau yra DB – antrą kartą neįrašome
+            if TM_CANDIDATE_KEY not in candidates:
+                svc.save_translation(
+                    original=data["text"],
+                    best=best,
+                    all_outs=candidates,
+                    src=src,
+                    tgt=tgt,
+                    is_doc=False
+                )
 
         result = {
             "translated_text": best,
             "candidates": [
                 {"model": model, "translation": translation} 
                 for model, translation in candidates.items()
-            ]
+            ],
+            # Kuriuo keliu pasirinktas vertimas (consensus, cheap_metrics, bert, full, ...) ir balai
+            "scoring": scoring
         }
+        # Etapų trukmės atsakyme – tik paprašius ({"timings": true} arba ?timings=1)
+        if data.get("timings") or request.args.get("timings") == "1":
+            result["timings"] = summarize_stages(timings)
         print(f"✅ Vertimo rezultatas: {result}")
         return jsonify(result), 200
     except Exception as e:
         print(f"❌ Klaida vertime: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@translation_bp.route("/stream", methods=["POST"])
+@login_required
+def translate_stream_api():
+    # Server-Sent Events: greičiausio modelio vertimas rodomas dekodavimo metu ("token"),
+    # po to kiti kandidatai ("candidate") ir hibridinis pasirinkimas ("final")
+    data = request.get_json(silent=True) or {}
+    try:
+        src, tgt = data["direction"].split("-")
+        text = data["text"]
+    except (KeyError, AttributeError, ValueError):
+        return jsonify({"error": "Reikia laukų text ir direction"}), 400
+    if len(text) > current_app.config["MAX_TEXT_LENGTH"]:
+        return jsonify({"error": "Tekstas per ilgas"}), 413
+    # Generatorius baigiasi ir įrašo po to, kai prisijungimo kontekstas gali būti nebepasiekiamas
+    user_id = current_user.id
+
+    def sse(event: str, payload: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    def generate():
+        try:
+            for event, payload in svc.translate_stream(text, src, tgt):
+                # Įrašoma prieš siunčiant "final", kad atsijungęs klientas nenutrauktų įrašymo
+                if event == "final" and payload["candidates"] and TM_CANDIDATE_KEY not in payload["candidates"]:
+                    svc.save_translation(
+                        original=text,
+                        best=payload["translation"],
+                        all_outs=payload["candidates"],
+                        src=src,
+                        tgt=tgt,
+                        is_doc=False,
+                        user_id=user_id
+                    )
+                yield sse(event, payload)
+        except Exception as e:
+            print(f"❌ Klaida srautiniame vertime: {e}")
+            yield sse("error", {"error": str(e)})
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # nginx neturi buferizuoti srauto
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+@translation_bp.route("/batch", methods=["POST"])
+@login_required
+def translate_batch_api():
+    # {"direction": "lt-en", "segments": [...]} → NDJSON: po vieną eilutę kiekvienam segmentui
+    # įvesties tvarka, kai tik jo dalis išversta; segmento klaida nenutraukia visos partijos
+    data = request.get_json(silent=True) or {}
+    segments = data.get("segments")
+    try:
+        src, tgt = data["direction"].split("-")
+    except (KeyError, AttributeError, ValueError):
+        return jsonify({"error": "Neteisinga kryptis"}), 400
+    if not isinstance(segments, list) or not segments:
+        return jsonify({"error": "segments turi būti netuščias sąrašas"}), 400
+    max_segments = current_app.config["BATCH_API_MAX_SEGMENTS"]
+    if len(segments) > max_segments:
+        return jsonify({"error": f"Daugiausia {max_segments} segmentų vienoje užklausoje"}), 413
+
+    chunk_size = current_app.config["BATCH_API_CHUNK_SIZE"]
+    max_length = current_app.config["MAX_TEXT_LENGTH"]
+    user_id = current_user.id
+
+    def segment_error(segment):
+        if not isinstance(segment, str):
+            return "Segmentas turi būti tekstas"
+        if len(segment) > max_length:
+            return f"Segmentas ilgesnis nei {max_length} simbolių"
+        return None
+
+    def line(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False) + "\n"
+
+    def result_line(index, best, candidates, details):
+        return line({
+            "index": index,
+            "translation": best,
+            "model": details.get("best_model") or (TM_CANDIDATE_KEY if TM_CANDIDATE_KEY in candidates else None),
+            "path": details.get("path"),
+        })
+
+    def generate():
+        errors = 0
+        for start in range(0, len(segments), chunk_size):
+            chunk = segments[start:start + chunk_size]
+            valid = [(start + i, seg) for i, seg in enumerate(chunk) if segment_error(seg) is None]
+            texts = [seg for _, seg in valid]
+            results = {}
+            try:
+                details = [{} for _ in texts]
+                for (index, _), res, det in zip(valid, svc.translate_batch(texts, src, tgt, details=details), details):
+                    results[index] = (res, det)
+            except Exception as e:
+                # Nepavykus visai daliai, segmentai verčiami po vieną, kad klaida liktų tik ties kaltu segmentu
+                print(f"⚠️ [batch] Dalis nuo {start} nepavyko ({e}), verčiama po vieną")
+                for index, seg in valid:
+                    try:
+                        det = {}
+                        results[index] = (svc.translate_text(seg, src, tgt, details=det), det)
+                    except Exception as seg_err:
+                        results[index] = seg_err
+
+            new_pairs = []
+            for i, seg in enumerate(chunk):
+                index = start + i
+                outcome = results.get(index)
+                if outcome is None or isinstance(outcome, Exception):
+                    errors += 1
+                    yield line({"index": index, "error": segment_error(seg) or str(outcome)})
+                    continue
+                (best, candidates), det = outcome
+                if seg.strip() and TM_CANDIDATE_KEY not in candidates:
+                    new_pairs.append((seg, best))
+                yield result_line(index, best, candidates, det)
+
+            if new_pairs:
+                svc.save_segments(new_pairs, src, tgt, user_id=user_id, is_doc=False)
+
+        yield line({"done": True, "count": len(segments), "errors": errors})
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@translation_bp.route("/tm/matches", methods=["POST"])
+@login_required
+def tm_matches_api():
+    # Apytiksliai TM atitikmenys, kuriuos UI gali pasiūlyti vietoj vertimo modeliais.
+    # Vartotojas mato tik savo įrašus (šaltinio tekstas gali būti konfidencialus), administratorius – visus
+    try:
+        data = request.json
+        src, tgt = data["direction"].split("-")
+        threshold = float(data.get("threshold", current_app.config["TM_FUZZY_THRESHOLD"]))
+        top_k = int(data.get("k", current_app.config["TM_FUZZY_TOP_K"]))
+        user_id = None if current_user.role.lower() == "admin" else current_user.id
+        matches = lookup_fuzzy(data["text"], src, tgt, threshold=threshold, top_k=top_k, user_id=user_id)
+        return jsonify({"matches": matches}), 200
+    except Exception as e:
+        print(f"❌ Klaida TM paieškoje: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@translation_bp.route("/models", methods=["GET"])
+def models_status():
+    # Kurie modeliai šiuo metu laikomi atmintyje ir kiek jie užima
+    return jsonify(svc.hf_models.status()), 200
+
 @translation_bp.route("/upload", methods=["POST"])
 @login_required
 def upload_and_translate():
@@ -88,40 +251,37 @@ def upload_and_translate():
     out_name = f"test_translated_{uid}{ext}"
     output_path = os.path.join(out_dir, out_name)
 
-    if ext.lower() == ".txt":
-        text = open(input_path, encoding="utf-8").read()
-        best, _ = svc.translate_text(text, src, tgt)
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(best)
-
-    elif ext.lower() == ".docx":
-        doc = Document(input_path)
-        for p in doc.paragraphs:
-            if p.text.strip():
-                translated, _ = svc.translate_text(p.text, src, tgt)
-                p.text = translated
-        doc.save(output_path)
-
-    else:
+    file_type = ext.lower().lstrip(".")
+    if file_type not in ("txt", "docx"):
         return ("Nepalaikomas failo tipas", 400)
-    
-    svc.save_translation(
-        original=None,
-        best=None,
-        all_outs={},
+
+    # Vertimas vykdomas fone; klientas progresą tikrina per /translate/jobs/<id>
+    job = job_service.create_job(
+        user_id=current_user.id,
         src=src,
         tgt=tgt,
-        is_doc=True,
-        file_path=input_path,
-        translated_path=output_path
+        file_type=file_type,
+        input_path=input_path,
+        output_path=output_path,
+        out_name=out_name
     )
+    print(f"📥 Dokumento darbas įtrauktas į eilę: {job.id}")
+
+    return jsonify({
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": url_for("translation.job_status", job_id=job.id)
+    }), 202
 
-    download_url = f"/download/{out_name}"
-    print(f"🔍 Generuotas kelias: /download/{out_name}")
-    print(f"🔍 Ar failas egzistuoja? {os.path.exists(output_path)}")
 
-    return jsonify({"download_url": download_url, "status": "ok"})
-    
+@translation_bp.route("/jobs/<job_id>", methods=["GET"])
+@login_required
+def job_status(job_id):
+    job = TranslationJob.query.get(job_id)
+    if not job or (job.user_id != current_user.id and current_user.role.lower() != "admin"):
+        return jsonify({"error": "Darbas nerastas"}), 404
+    return jsonify(job.to_dict()), 200
+
 @translation_bp.route("/download/<filename>", methods=["GET"])
 def download_translated_file(filename):
     print(f"🔍 Bandome parsiųsti failą: {filename}")
@@ -1,16 +1,27 @@
 # app/upload/services/document_service.py
 
 import os
-from flask import current_app
 from docx import Document
-from app.database.models import TranslationMemory
-from flask_login import current_user
-from app import db
+from docx.text.run import Run
+from lxml import etree
+from app.translation.services.translation_memory import TM_CANDIDATE_KEY
+from app.translation.services.segmentation import iter_text_chunks, split_sentences
+from config import Config
+from app.metrics.instruments import stage
 
 # Hardcoded path locations
 UPLOAD_FOLDER = r"E:\univerui\4_kursas\bakalauras\Test\Translation-system\instance\uploads"
 TRANSLATED_FOLDER = r"E:\univerui\4_kursas\bakalauras\Test\Translation-system\instance\translations"
 
+# Run'o turinys, kurio negalima perrašyti per run.text
+NON_TEXT_RUN_CONTENT = (
+    "./*[local-name()='drawing' or local-name()='pict' "
+    "or local-name()='object' or local-name()='AlternateContent']"
+)
+
+# Pastraipos run'ai dokumento tvarka, įskaitant esančius nuorodose (paragraph.runs jų neapima)
+PARAGRAPH_RUNS = "./*[local-name()='r'] | ./*[local-name()='hyperlink']/*[local-name()='r']"
+
 class DocumentService:
 
     def save_original(self, file):
@@ -20,26 +31,184 @@ class DocumentService:
         file.save(path)
         return path
 
-    def translate_docx(self, input_path: str, output_path: str, translate_fn, src_lang, tgt_lang):
-        doc = Document(input_path)
-        
-        for para in doc.paragraphs:
-            if para.text.strip():
-                translated = translate_fn(para.text)
-                memory = TranslationMemory(
-                    source_text=para.text,
-                    translated_text=translated,
-                    source_lang=src_lang,
-                    target_lang=tgt_lang,
-                    is_document=True,
-                    file_path=input_path,
-                    translated_path=output_path,
-                    user_id=current_user.id
-                )
-                db.session.add(memory)
-
-        db.session.commit()
-        doc.save(output_path)
+    def count_txt_paragraphs(self, input_path: str) -> int:
+        with open(input_path, encoding="utf-8") as f:
+            return sum(1 for line in f if line.strip())
+
+    def translate_txt_file(self, input_path: str, output_path: str, translate_batch,
+                           progress=None, on_segments=None, chunk_chars: int = None):
+        # Srautinis vertimas: failas skaitomas dalimis (ties sakinių ribomis), kiekviena dalis
+        # išverčiama eilutėmis ir iškart įrašoma į output_path – atmintis nepriklauso nuo failo dydžio.
+        # translate_batch(list[str]) -> list[(vertimas, kandidatai)]
+        chunk_chars = chunk_chars or Config.TXT_CHUNK_CHARS
+        total = self.count_txt_paragraphs(input_path)
+        done = 0
+        if progress:
+            progress(done, total)
+
+        with open(input_path, encoding="utf-8") as src, \
+                open(output_path, "w", encoding="utf-8") as out:
+            for chunk in iter_text_chunks(src, chunk_chars):
+                lines = chunk.splitlines(keepends=True)
+                bodies = [line.rstrip("\r\n") for line in lines]
+                results = translate_batch(bodies)
+
+                new_segments = {}
+                for line, body, (translated, candidates) in zip(lines, bodies, results):
+                    out.write(translated + line[len(body):])
+                    if body.strip() and candidates and TM_CANDIDATE_KEY not in candidates:
+                        new_segments[body] = translated
+                out.flush()
+
+                # Eilutė, nukirpta per vidurį, skaičiuojama kai baigiasi
+                done += sum(1 for line in lines if line.strip() and line.endswith("\n"))
+                if on_segments and new_segments:
+                    on_segments(list(new_segments.items()))
+                if progress:
+                    progress(min(done, total), total)
+
+        if progress:
+            progress(total, total)
+
+    def _container_paragraphs(self, container, seen_cells: set):
+        # Pastraipos ir lentelės (įskaitant įdėtines); sujungti langeliai grąžinami vieną kartą.
+        # Aibėje laikomi patys <w:tc> elementai (ne id()): lxml proxy objektai atlaisvinami,
+        # ir vėlesni langeliai gautų tą patį id(), todėl liktų neišversti
+        yield from container.paragraphs
+        for table in container.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    if cell._tc in seen_cells:
+                        continue
+                    seen_cells.add(cell._tc)
+                    yield from self._container_paragraphs(cell, seen_cells)
+
+    def iter_docx_paragraphs(self, doc):
+        seen_cells: set = set()
+        yield from self._container_paragraphs(doc, seen_cells)
+
+        for section in doc.sections:
+            for part in (
+                section.header, section.footer,
+                section.first_page_header, section.first_page_footer,
+                section.even_page_header, section.even_page_footer,
+            ):
+                # Susietas su ankstesne sekcija – turinys jau surinktas
+                if part.is_linked_to_previous:
+                    continue
+                yield from self._container_paragraphs(part, seen_cells)
+
+    @staticmethod
+    def _text_runs(paragraph) -> list:
+        # Tik grynai tekstiniai run'ai: run'ai su paveikslėliais/objektais neliečiami,
+        # nes run.text priskyrimas ištrintų jų turinį
+        runs = [Run(r, paragraph) for r in paragraph._p.xpath(PARAGRAPH_RUNS)]
+        return [
+            run for run in runs
+            if run.text and not run._r.xpath(NON_TEXT_RUN_CONTENT)
+        ]
+
+    @staticmethod
+    def _format_groups(runs: list) -> list:
+        # Gretimi run'ai su vienodu formatavimu (rPr) ir tuo pačiu tėvu (pastraipa ar ta pati nuoroda)
+        groups, last = [], None
+        for run in runs:
+            rpr = run._r.rPr
+            signature = (run._r.getparent(), etree.tostring(rpr) if rpr is not None else b"")
+            if groups and signature == last:
+                groups[-1].append(run)
+            else:
+                groups.append([run])
+            last = signature
+        return groups
+
+    def collect_segments(self, doc) -> dict:
+        # {šaltinio tekstas: [pastraipos run'ų sąrašai]} – vienodi segmentai verčiami vieną kartą
+        segments: dict = {}
+        for paragraph in self.iter_docx_paragraphs(doc):
+            runs = self._text_runs(paragraph)
+            text = "".join(run.text for run in runs)
+            if text.strip():
+                segments.setdefault(text, []).append(runs)
+        return segments
+
+    @staticmethod
+    def _write_group(group: list, text: str):
+        # Tekstas įrašomas į pirmą grupės run'ą (išlaiko jo formatavimą), kiti išvalomi
+        group[0].text = text
+        for run in group[1:]:
+            run.text = ""
+
+    def apply_translation(self, runs: list, translated: str):
+        # Vienodai suformatuota pastraipa: visas vertimas į pirmą run'ą.
+        # Mišrus formatavimas (paryškinimai, nuorodos): kiekvienas išverstas sakinys įrašomas į
+        # formatavimo grupę, kurioje prasideda atitinkamas šaltinio sakinys. Formatavimas
+        # išlaikomas sakinio tikslumu; jei sakinių skaičius nesutampa – viskas į pirmą grupę.
+        groups = self._format_groups(runs)
+        if len(groups) == 1:
+            self._write_group(runs, translated)
+            return
+
+        source_sentences, source_seps = split_sentences("".join(run.text for run in runs))
+        target_sentences, target_seps = split_sentences(translated)
+        if len(source_sentences) != len(target_sentences):
+            print(f"⚠️ DOCX: sakinių skaičius nesutampa ({len(source_sentences)} → {len(target_sentences)}), "
+                  "mišrus pastraipos formatavimas suvienodinamas")
+            self._write_group(runs, translated)
+            return
+
+        # Kiekvienos grupės pabaigos pozicija šaltinio tekste
+        ends, pos = [], 0
+        for group in groups:
+            pos += sum(len(run.text) for run in group)
+            ends.append(pos)
+
+        texts = [""] * len(groups)
+        pos, owner, previous = 0, 0, 0
+        for i, sentence in enumerate(target_sentences):
+            while owner < len(ends) - 1 and pos >= ends[owner]:
+                owner += 1
+            if i:
+                # Skirtukas (tarpas) lieka ankstesnio sakinio grupės gale, kaip šaltinyje
+                texts[previous] += target_seps[i - 1]
+            texts[owner] += sentence
+            previous = owner
+            pos += len(source_sentences[i]) + (len(source_seps[i]) if i < len(source_seps) else 0)
+
+        for group, text in zip(groups, texts):
+            self._write_group(group, text)
+
+    def translate_docx(self, input_path: str, output_path: str, translate_batch,
+                       progress=None, on_segments=None, chunk_size: int = None):
+        # Surenkami visi dokumento segmentai (tekstas, lentelės, antraštės, poraštės),
+        # unikalūs verčiami partijomis ir įrašomi atgal į run'us.
+        # translate_batch(list[str]) -> list[(vertimas, kandidatai)]
+        with stage("docx_parse"):
+            doc = Document(input_path)
+            segments = self.collect_segments(doc)
+        sources = list(segments)
+        total = len(sources)
+        occurrences = sum(len(v) for v in segments.values())
+        print(f"📄 DOCX: {occurrences} segmentų, unikalių {total}")
+        if progress:
+            progress(0, total)
+
+        chunk_size = chunk_size or max(total, 1)
+        for start in range(0, total, chunk_size):
+            chunk = sources[start:start + chunk_size]
+            new_segments = {}
+            for source, (translated, candidates) in zip(chunk, translate_batch(chunk)):
+                for runs in segments[source]:
+                    self.apply_translation(runs, translated)
+                if TM_CANDIDATE_KEY not in candidates:
+                    new_segments[source] = translated
+            if on_segments and new_segments:
+                on_segments(list(new_segments.items()))
+            if progress:
+                progress(start + len(chunk), total)
+
+        with stage("docx_write"):
+            doc.save(output_path)
         return output_path
 
     def get_upload_path(self, filename):
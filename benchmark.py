@@ -0,0 +1,266 @@
+# benchmark.py
+#
+# Vertimo konvejerio našumo matavimai su mažais atsitiktiniais modeliais (be interneto ir be
+# kelių GB svorių). Matuojami etapai: generate, back-translation, BLEU/ChrF, BERTScore,
+# select_best_by_hybrid (full / adaptive), visas teksto vertimas ir .docx kelias.
+#
+#   python benchmark.py run --out bench_before.json
+#   python benchmark.py run --out bench_after.json --lengths 8,32 --batch-sizes 1,16
+#   python benchmark.py compare bench_before.json bench_after.json --threshold 0.10
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import torch
+import transformers
+
+from config import Config
+
+STAGES = (
+    "generate", "back_translation", "bleu_chrf", "bert",
+    "select_best_full", "select_best_adaptive", "translate_pipeline", "docx",
+)
+SRC, TGT = "lt", "en"
+
+
+def rss_peak_mb() -> float:
+    # ru_maxrss: Linux – KB, macOS – baitai
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def measure(fn, items: int, repeats: int, setup=None) -> dict:
+    # Vienas įšildymo paleidimas, tada repeats matavimų; Python atminties pikas (tracemalloc)
+    # matuojamas atskiru paleidimu, kad sekimas neiškraipytų laiko
+    if setup:
+        setup()
+    fn()
+
+    times = []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    fn()
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(times)
+    return {
+        "items": items,
+        "repeats": repeats,
+        "median_s": median,
+        "min_s": min(times),
+        "mean_s": statistics.mean(times),
+        "ops_per_s": items / median if median else None,
+        "py_peak_kb": py_peak / 1024,
+        "rss_peak_mb": rss_peak_mb(),
+    }
+
+
+def make_docx(path: str, paragraphs: list):
+    from docx import Document
+
+    doc = Document()
+    doc.sections[0].header.paragraphs[0].text = paragraphs[0]
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    table = doc.add_table(rows=2, cols=2)
+    for i, cell in enumerate(table._cells):
+        cell.text = paragraphs[i % len(paragraphs)]
+    doc.save(path)
+
+
+def run(args):
+    from benchmarks.tiny_models import build_bert_dir, build_tiny_models, make_text, train_spm
+
+    torch.set_num_threads(args.threads)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="tiny_models_")
+    print(f"🧪 Maži modeliai kuriami: {workdir}")
+    models = build_tiny_models(workdir, max_new_tokens=args.max_new_tokens, num_beams=args.num_beams)
+
+    # BERTScore – mažas vietinis XLM-R; nustatoma prieš pirmą get_bert_engine() kvietimą
+    Config.BERT_MODEL_TYPE = build_bert_dir(workdir, train_spm(workdir))
+    Config.BERT_NUM_LAYERS = 2
+
+    from app.translation.services.evaluation.batch import clear_reference_scorers
+    from app.translation.services.evaluation.bert import get_bert_engine
+    from app.translation.services.generation import translate_texts
+    from app.translation.services.model_evaluator import (
+        compute_back_translations_batch, filter_models_by_direction, round_trip_bert_batch,
+        round_trip_metrics_batch, select_best_by_hybrid,
+    )
+    from app.upload.services.document_service import DocumentService
+
+    stages = [s for s in args.stages.split(",") if s] if args.stages else list(STAGES)
+    lengths = [int(x) for x in args.lengths.split(",")]
+    batch_sizes = [int(x) for x in args.batch_sizes.split(",")]
+    forward = filter_models_by_direction(models, SRC, TGT)
+    reverse = filter_models_by_direction(models, TGT, SRC)
+    engine = get_bert_engine()
+    rng = random.Random(args.seed)
+    results = []
+
+    def record(stage, model, length, batch_size, fn, items, setup=None):
+        row = {"stage": stage, "model": model, "length": length, "batch_size": batch_size}
+        row.update(measure(fn, items, args.repeats, setup=setup))
+        results.append(row)
+        print(
+            f"⏱️ {stage:22s} {model or '-':14s} ilgis={length:<4d} partija={batch_size:<4d} "
+            f"{row['median_s'] * 1000:9.1f} ms  {row['ops_per_s']:8.1f} op/s  "
+            f"RSS {row['rss_peak_mb']:.0f} MB"
+        )
+
+    for length in lengths:
+        text = make_text(length, rng)
+        candidates = {key: translate_texts(key, info, [text], SRC, TGT)[0] for key, info in forward.items()}
+        back_by_text = compute_back_translations_batch(list(candidates.values()), reverse, SRC, TGT)
+        back_by_model = {key: back_by_text[c] for key, c in candidates.items()}
+
+        if "back_translation" in stages:
+            record("back_translation", None, length, len(candidates), lambda: compute_back_translations_batch(
+                list(candidates.values()), reverse, SRC, TGT
+            ), len(candidates))
+
+        if "bleu_chrf" in stages:
+            record("bleu_chrf", None, length, len(candidates), lambda: round_trip_metrics_batch(
+                back_by_model, text
+            ), len(candidates), setup=clear_reference_scorers)
+
+        if "bert" in stages:
+            record("bert", None, length, len(candidates), lambda: round_trip_bert_batch(
+                back_by_model, text, SRC
+            ), len(candidates), setup=engine.clear_cache)
+
+        for mode in ("full", "adaptive"):
+            if f"select_best_{mode}" in stages:
+                record(f"select_best_{mode}", None, length, len(candidates), lambda: select_best_by_hybrid(
+                    candidates, models, text, SRC, TGT, mode=mode
+                ), len(candidates), setup=engine.clear_cache)
+
+        for batch_size in batch_sizes:
+            texts = [make_text(length, rng) for _ in range(batch_size)]
+
+            if "generate" in stages:
+                for key, info in forward.items():
+                    record("generate", key, length, batch_size, lambda: translate_texts(
+                        key, info, texts, SRC, TGT
+                    ), batch_size)
+
+            if "translate_pipeline" in stages:
+                # Kaip TranslationService.translate_batch, tik be TM ir DB
+                def pipeline():
+                    per_model = {key: translate_texts(key, info, texts, SRC, TGT) for key, info in forward.items()}
+                    for pos, source in enumerate(texts):
+                        select_best_by_hybrid(
+                            {key: outs[pos] for key, outs in per_model.items()},
+                            models, source, SRC, TGT, mode="adaptive"
+                        )
+                record("translate_pipeline", None, length, batch_size, pipeline, batch_size,
+                       setup=engine.clear_cache)
+
+            if "docx" in stages:
+                in_path = os.path.join(workdir, f"bench_{length}_{batch_size}.docx")
+                out_path = os.path.join(workdir, f"bench_{length}_{batch_size}_out.docx")
+                make_docx(in_path, texts)
+                info = forward["lt_en"]
+                record("docx", "lt_en", length, batch_size, lambda: DocumentService().translate_docx(
+                    in_path, out_path,
+                    lambda chunk: [(t, {}) for t in translate_texts("lt_en", info, chunk, SRC, TGT)]
+                ), batch_size)
+
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "torch": torch.__version__,
+            "transformers": transformers.__version__,
+            "threads": torch.get_num_threads(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"💾 Rezultatai įrašyti: {args.out}")
+
+
+def compare(args) -> int:
+    with open(args.baseline, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        cand = json.load(f)
+
+    def key(row):
+        return row["stage"], row["model"] or "-", row["length"], row["batch_size"]
+
+    base_rows = {key(r): r for r in base["results"]}
+    regressions = 0
+    print(f"{'etapas':22s} {'modelis':14s} {'ilgis':>5s} {'partija':>7s} {'prieš, ms':>10s} {'po, ms':>10s} {'santykis':>9s}")
+    for row in cand["results"]:
+        old = base_rows.get(key(row))
+        if old is None:
+            continue
+        ratio = row["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+        if ratio > 1 + args.threshold:
+            verdict = "REGRESIJA"
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            verdict = "pagreitis"
+        else:
+            verdict = ""
+        stage, model, length, batch_size = key(row)
+        print(
+            f"{stage:22s} {model:14s} {length:5d} {batch_size:7d} "
+            f"{old['median_s'] * 1000:10.1f} {row['median_s'] * 1000:10.1f} {ratio:8.2f}× {verdict}"
+        )
+    print(f"\nRegresijų (> {args.threshold:.0%}): {regressions}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vertimo konvejerio našumo matavimai su mažais modeliais")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="paleisti matavimus ir įrašyti JSON")
+    p_run.add_argument("--out", default="benchmark.json")
+    p_run.add_argument("--stages", default="", help=f"kableliais atskirti etapai (numatyta: visi) – {','.join(STAGES)}")
+    p_run.add_argument("--lengths", default="8,32,128", help="teksto ilgiai žodžiais")
+    p_run.add_argument("--batch-sizes", default="1,8,32", help="tekstų skaičius vienoje užklausoje")
+    p_run.add_argument("--repeats", type=int, default=5)
+    p_run.add_argument("--threads", type=int, default=max(1, os.cpu_count() or 1))
+    p_run.add_argument("--max-new-tokens", type=int, default=32)
+    p_run.add_argument("--num-beams", type=int, default=1)
+    p_run.add_argument("--seed", type=int, default=0)
+    p_run.add_argument("--workdir", default="", help="modelių katalogas (numatyta: laikinas)")
+
+    p_cmp = sub.add_parser("compare", help="palyginti du JSON rezultatus")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("candidate")
+    p_cmp.add_argument("--threshold", type=float, default=0.10, help="leistinas sulėtėjimas (0.10 = 10 %%)")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# benchmarks/tiny_models.py
+#
+# Maži atsitiktinai inicializuoti Marian / M2M100 / mBART-50 modeliai ir tokenizeriai
+# našumo matavimams be interneto: SentencePiece apmokomas vietoje iš sugeneruoto korpuso.
+
+import json
+import os
+import random
+from typing import Dict, List
+
+import sentencepiece as spm
+import torch
+from transformers import (
+    M2M100Config, M2M100ForConditionalGeneration, M2M100Tokenizer,
+    MarianConfig, MarianMTModel, MarianTokenizer,
+    MBart50Tokenizer, MBartConfig, MBartForConditionalGeneration,
+    XLMRobertaConfig, XLMRobertaModel, XLMRobertaTokenizer,
+)
+
+# Žodžiai tekstams ir SentencePiece korpusui (lietuviški ir angliški, su diakritikais)
+WORDS = (
+    "vertimas sistema modelis sakinys dokumentas kalba tekstas žodis rezultatas kokybė "
+    "greitis atmintis užklausa vartotojas serveris lentelė pastraipa antraštė šaltinis "
+    "translation system model sentence document language text word result quality "
+    "speed memory request user server table paragraph header source target"
+).split()
+
+# Tas pats dydis visiems modeliams: pakanka realiam generate() keliui, bet ne svoriams
+TINY_DIMS = dict(
+    d_model=64,
+    encoder_layers=2,
+    decoder_layers=2,
+    encoder_attention_heads=2,
+    decoder_attention_heads=2,
+    encoder_ffn_dim=128,
+    decoder_ffn_dim=128,
+    max_position_embeddings=512,
+)
+
+
+def make_text(words: int, rng: random.Random) -> str:
+    # Tekstas iš sakinių po ~8 žodžius, kad veiktų ir sakinių skaidymas
+    out, sentence = [], []
+    for i in range(words):
+        sentence.append(rng.choice(WORDS))
+        if len(sentence) == 8 or i == words - 1:
+            out.append(" ".join(sentence).capitalize() + ".")
+            sentence = []
+    return " ".join(out)
+
+
+def train_spm(workdir: str, vocab_size: int = 400) -> str:
+    model_prefix = os.path.join(workdir, "tiny_spm")
+    if not os.path.exists(model_prefix + ".model"):
+        rng = random.Random(0)
+        corpus = [make_text(rng.randint(4, 24), rng) for _ in range(2000)]
+        spm.SentencePieceTrainer.train(
+            sentence_iterator=iter(corpus),
+            model_prefix=model_prefix,
+            vocab_size=vocab_size,
+            hard_vocab_limit=False,
+            character_coverage=1.0,
+            minloglevel=2,
+        )
+    return model_prefix + ".model"
+
+
+def _spm_pieces(spm_path: str) -> List[str]:
+    sp = spm.SentencePieceProcessor(model_file=spm_path)
+    return [
+        sp.id_to_piece(i) for i in range(sp.get_piece_size())
+        if sp.id_to_piece(i) not in ("<unk>", "<s>", "</s>")
+    ]
+
+
+def _write_vocab(workdir: str, name: str, specials: List[str], pieces: List[str]) -> str:
+    vocab = {tok: i for i, tok in enumerate(specials)}
+    for piece in pieces:
+        vocab.setdefault(piece, len(vocab))
+    path = os.path.join(workdir, name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(vocab, f, ensure_ascii=False)
+    return path
+
+
+def _finish(model, max_new_tokens: int, num_beams: int):
+    # Atsitiktinis modelis retai sugeneruoja </s>, todėl ilgis ribojamas aiškiai
+    model.generation_config.max_new_tokens = max_new_tokens
+    model.generation_config.max_length = None
+    model.generation_config.num_beams = num_beams
+    model.eval()
+    return model
+
+
+def build_marian(workdir: str, spm_path: str, max_new_tokens: int, num_beams: int) -> dict:
+    vocab = _write_vocab(workdir, "marian_vocab.json", ["</s>", "<unk>", "<pad>"], _spm_pieces(spm_path))
+    tok = MarianTokenizer(source_spm=spm_path, target_spm=spm_path, vocab=vocab)
+    config = MarianConfig(
+        vocab_size=len(tok), decoder_vocab_size=len(tok),
+        pad_token_id=tok.pad_token_id, eos_token_id=tok.eos_token_id,
+        decoder_start_token_id=tok.pad_token_id, forced_eos_token_id=tok.eos_token_id,
+        **TINY_DIMS,
+    )
+    return {"tokenizer": tok, "model": _finish(MarianMTModel(config), max_new_tokens, num_beams)}
+
+
+def build_m2m100(workdir: str, spm_path: str, max_new_tokens: int, num_beams: int) -> dict:
+    vocab = _write_vocab(workdir, "m2m100_vocab.json", ["<s>", "<pad>", "</s>", "<unk>"], _spm_pieces(spm_path))
+    tok = M2M100Tokenizer(vocab_file=vocab, spm_file=spm_path, src_lang="lt", tgt_lang="en")
+    config = M2M100Config(
+        vocab_size=len(tok),
+        pad_token_id=tok.pad_token_id, bos_token_id=tok.bos_token_id,
+        eos_token_id=tok.eos_token_id, decoder_start_token_id=tok.eos_token_id,
+        **TINY_DIMS,
+    )
+    return {"tokenizer": tok, "model": _finish(M2M100ForConditionalGeneration(config), max_new_tokens, num_beams)}
+
+
+def build_mbart(workdir: str, spm_path: str, max_new_tokens: int, num_beams: int) -> dict:
+    tok = MBart50Tokenizer(vocab_file=spm_path, src_lang="en_XX", tgt_lang="lt_LT")
+    config = MBartConfig(
+        vocab_size=len(tok),
+        pad_token_id=tok.pad_token_id, bos_token_id=tok.bos_token_id,
+        eos_token_id=tok.eos_token_id, decoder_start_token_id=tok.eos_token_id,
+        **TINY_DIMS,
+    )
+    return {"tokenizer": tok, "model": _finish(MBartForConditionalGeneration(config), max_new_tokens, num_beams)}
+
+
+def build_bert_dir(workdir: str, spm_path: str) -> str:
+    # Mažas XLM-R enkoderis BERTScore'ui; bert_score jį krauna iš katalogo (BERT_MODEL_TYPE=kelias)
+    out_dir = os.path.join(workdir, "tiny-xlm-roberta")
+    if not os.path.exists(os.path.join(out_dir, "config.json")):
+        tok = XLMRobertaTokenizer(vocab_file=spm_path)
+        config = XLMRobertaConfig(
+            vocab_size=len(tok), hidden_size=64, num_hidden_layers=2,
+            num_attention_heads=2, intermediate_size=128, max_position_embeddings=514,
+        )
+        tok.save_pretrained(out_dir)
+        XLMRobertaModel(config).save_pretrained(out_dir)
+    return out_dir
+
+
+def build_tiny_models(workdir: str, max_new_tokens: int = 32, num_beams: int = 1,
+                      seed: int = 0) -> Dict[str, dict]:
+    # Raktai sutampa su HF_MODELS, kad model_evaluator rastų reverse modelius ir
+    # direction_kwargs() pritaikytų tą patį m2m100 / mBART kelią kaip produkcijoje
+    os.makedirs(workdir, exist_ok=True)
+    torch.manual_seed(seed)
+    spm_path = train_spm(workdir)
+    return {
+        "lt_en": build_marian(workdir, spm_path, max_new_tokens, num_beams),
+        "en_lt": build_marian(workdir, spm_path, max_new_tokens, num_beams),
+        "m2m100_418M": build_m2m100(workdir, spm_path, max_new_tokens, num_beams),
+        "mbart50_en2m": build_mbart(workdir, spm_path, max_new_tokens, num_beams),
+        "mbart50_m2en": build_mbart(workdir, spm_path, max_new_tokens, num_beams),
+    }
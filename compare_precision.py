@@ -0,0 +1,83 @@
+# compare_precision.py
+#
+# Palygina modelio vertimo kokybę ir greitį fp32 vs bf16/int8 režimu su pavyzdžių rinkiniu.
+# Pavyzdžių failas – TSV: šaltinis<TAB>etalonas, po vieną porą eilutėje.
+#
+#   python compare_precision.py --model lt_en --direction lt-en --samples samples_lt_en.tsv --precision int8
+
+import argparse
+import time
+
+import sacrebleu
+
+from app.ml_models.model_initializer import load_model, model_size_bytes
+from app.translation.services.generation import translate_texts
+
+
+def read_samples(path: str, limit: int):
+    sources, references = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 2 or not parts[0].strip():
+                continue
+            sources.append(parts[0])
+            references.append(parts[1])
+            if limit and len(sources) >= limit:
+                break
+    return sources, references
+
+
+def evaluate(key: str, precision: str, sources, references, src: str, tgt: str) -> dict:
+    info = load_model(key, precision=precision)
+    if info is None:
+        raise RuntimeError(f"Nepavyko pakrauti '{key}' ({precision})")
+
+    start = time.time()
+    hypotheses = translate_texts(key, info, sources, src, tgt)
+    duration = time.time() - start
+
+    return {
+        "precision": precision,
+        "bleu": sacrebleu.corpus_bleu(hypotheses, [references]).score,
+        "chrf": sacrebleu.corpus_chrf(hypotheses, [references]).score,
+        "seconds": duration,
+        "size_mb": model_size_bytes(info["model"]) / 2**20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fp32 vs sumažinto tikslumo modelio palyginimas")
+    parser.add_argument("--model", required=True, help="HF_MODELS raktas, pvz. lt_en")
+    parser.add_argument("--direction", required=True, help="pvz. lt-en")
+    parser.add_argument("--samples", required=True, help="TSV failas: šaltinis<TAB>etalonas")
+    parser.add_argument("--precision", default="int8", choices=["bf16", "int8"])
+    parser.add_argument("--limit", type=int, default=200)
+    args = parser.parse_args()
+
+    src, tgt = args.direction.split("-")
+    sources, references = read_samples(args.samples, args.limit)
+    print(f"Pavyzdžių: {len(sources)}")
+
+    rows = [
+        evaluate(args.model, precision, sources, references, src, tgt)
+        for precision in ("fp32", args.precision)
+    ]
+
+    print(f"\n{'tikslumas':10s} {'BLEU':>7s} {'chrF':>7s} {'laikas,s':>9s} {'MB':>8s}")
+    for row in rows:
+        print(
+            f"{row['precision']:10s} {row['bleu']:7.2f} {row['chrf']:7.2f} "
+            f"{row['seconds']:9.2f} {row['size_mb']:8.0f}"
+        )
+
+    base, other = rows
+    print(
+        f"\nΔBLEU={other['bleu'] - base['bleu']:+.2f}, ΔchrF={other['chrf'] - base['chrf']:+.2f}, "
+        f"pagreitis ×{base['seconds'] / max(other['seconds'], 1e-9):.2f}, "
+        f"atmintis ×{other['size_mb'] / max(base['size_mb'], 1e-9):.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -10,4 +10,86 @@ class Config:
     TRANSLATED_FOLDER = r"E:\univerui\4_kursas\bakalauras\Test\Translation-system\instance\translations"
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024
     ALLOWED_EXTENSIONS = {"txt", "docx"}
-    MAX_TEXT_LENGTH = 5000
\ No newline at end of file
+    MAX_TEXT_LENGTH = 5000
+
+    # Partijinis API (/translate/batch): didžiausias segmentų skaičius ir kiek segmentų verčiama vienu kartu
+    BATCH_API_MAX_SEGMENTS = int(os.getenv("BATCH_API_MAX_SEGMENTS", 5000))
+    BATCH_API_CHUNK_SIZE = int(os.getenv("BATCH_API_CHUNK_SIZE", 32))
+
+    # Partijinis (batched) vertimas: sakinių skaičius ir tokenų riba vienoje generate() partijoje
+    TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", 16))
+    TRANSLATION_MAX_BATCH_TOKENS = int(os.getenv("TRANSLATION_MAX_BATCH_TOKENS", 4096))
+
+    # serve.py: darbininkų procesų skaičius ir adresas (modeliai kraunami tėviniame procese prieš fork())
+    SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", 2))
+    SERVE_HOST = os.getenv("SERVE_HOST", "127.0.0.1")
+    SERVE_PORT = int(os.getenv("SERVE_PORT", 5000))
+
+    # Kiek modelių generate() vykdoma lygiagrečiai (1 = nuosekliai) ir kiek torch gijų skirti kiekvienam
+    MODEL_PARALLELISM = int(os.getenv("MODEL_PARALLELISM", 1))
+    TORCH_THREADS_PER_MODEL = int(os.getenv("TORCH_THREADS_PER_MODEL", 0))
+
+    # Srautinis vertimas (/translate/stream): modeliai, kurių žetonai rodomi pirmiausia, kol nėra
+    # generate trukmių istorijos; vėliau renkamas greičiausias pagal vidutinę trukmę
+    STREAM_PREFERRED_MODELS = [k for k in os.getenv("STREAM_PREFERRED_MODELS", "lt_en,en_lt").split(",") if k]
+
+    # Mikro-partijos tarp lygiagrečių užklausų (numatyta išjungta): kiek ms laukti kitų segmentų ir didžiausia partija
+    MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "0") == "1"
+    MICROBATCH_WAIT_MS = float(os.getenv("MICROBATCH_WAIT_MS", 10))
+    MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", 32))
+
+    # BERTScore variklis: enkoderio modelis ir kiek šaltinio tekstų įterpinių laikyti talpykloje
+    BERT_MODEL_TYPE = os.getenv("BERT_MODEL_TYPE", "xlm-roberta-base")
+    BERT_REF_CACHE_SIZE = int(os.getenv("BERT_REF_CACHE_SIZE", 512))
+    # BLEU/ChrF: kiek šaltinio tekstų n-gramų statistikų laikyti talpykloje
+    METRIC_REF_CACHE_SIZE = int(os.getenv("METRIC_REF_CACHE_SIZE", 1024))
+    # Sluoksnis, iš kurio imami įterpiniai (0 = bert_score numatytasis; būtinas vietiniam modelio katalogui)
+    BERT_NUM_LAYERS = int(os.getenv("BERT_NUM_LAYERS", 0))
+
+    # Hibridinis vertinimas: "adaptive" (sutarimas → BLEU/ChrF → BERTScore tik kai lyderiai arti) arba "full";
+    # SCORING_BERT_MARGIN – BLEU/ChrF skirtumas (0–100), kurio ribose dar skaičiuojamas BERTScore
+    SCORING_MODE = os.getenv("SCORING_MODE", "adaptive")
+    SCORING_BERT_MARGIN = float(os.getenv("SCORING_BERT_MARGIN", 5.0))
+    SCORING_SINGLE_REVERSE = os.getenv("SCORING_SINGLE_REVERSE", "0") == "1"
+
+    # Modelių maršrutizatorius: praleidžia modelius, kurių laimėjimų dažnis (kryptis + ilgio grupė)
+    # mažesnis nei ROUTER_MIN_WIN_RATE; ROUTER_EXPLORE_RATE užklausų dalis visada leidžia visus modelius
+    ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "1") == "1"
+    ROUTER_MIN_WIN_RATE = float(os.getenv("ROUTER_MIN_WIN_RATE", 0.05))
+    ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", 50))
+    ROUTER_EXPLORE_RATE = float(os.getenv("ROUTER_EXPLORE_RATE", 0.1))
+    ROUTER_REFRESH_S = int(os.getenv("ROUTER_REFRESH_S", 60))
+
+    # Translation Memory: tikslaus atitikmens paieška prieš vertimą modeliais
+    TM_EXACT_MATCH = os.getenv("TM_EXACT_MATCH", "1") == "1"
+
+    # Write-behind TM įrašymas: fone, viena transakcija kas TM_FLUSH_ROWS eilučių arba TM_FLUSH_MS ms
+    TM_WRITE_BEHIND = os.getenv("TM_WRITE_BEHIND", "1") == "1"
+    TM_FLUSH_ROWS = int(os.getenv("TM_FLUSH_ROWS", 200))
+    TM_FLUSH_MS = float(os.getenv("TM_FLUSH_MS", 500))
+    # Kiek sekundžių dokumento darbas laukia savo TM įrašų; neįrašius – darbas pažymimas failed
+    TM_SAVE_TIMEOUT_S = float(os.getenv("TM_SAVE_TIMEOUT_S", 120))
+
+    # Apytikslė TM paieška (MinHash/LSH): minimalus panašumas ir kiek atitikmenų grąžinti
+    TM_FUZZY_THRESHOLD = float(os.getenv("TM_FUZZY_THRESHOLD", 0.75))
+    TM_FUZZY_TOP_K = int(os.getenv("TM_FUZZY_TOP_K", 5))
+
+    # Administratoriaus TM peržiūra: eilučių puslapyje ir teksto peržiūros ilgis (pilnas tekstas – pagal poreikį)
+    ADMIN_TM_PAGE_SIZE = int(os.getenv("ADMIN_TM_PAGE_SIZE", 50))
+    ADMIN_TM_PREVIEW_CHARS = int(os.getenv("ADMIN_TM_PREVIEW_CHARS", 200))
+
+    # HF modelių RAM biudžetas MB (0 = neribota); viršijus iškeliamas seniausiai naudotas modelis
+    MODEL_RAM_BUDGET_MB = int(os.getenv("MODEL_RAM_BUDGET_MB", 0))
+
+    # Modelių įšildymas fone paleidus aplikaciją; WARMUP_MODELS – kableliais atskirti raktai (tuščia = visi)
+    WARMUP_ON_START = os.getenv("WARMUP_ON_START", "1") == "1"
+    WARMUP_MODELS = [k for k in os.getenv("WARMUP_MODELS", "").split(",") if k]
+
+    # Foniniai dokumentų vertimo darbai: darbininkų gijų skaičius ir pastraipų kiekis vienoje partijoje
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+    JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", 16))
+    # Po kiek sekundžių be progreso vykdomas darbas laikomas našlaičiu (jo procesas nebegyvas)
+    JOB_STALE_S = int(os.getenv("JOB_STALE_S", 900))
+
+    # Srautinis .txt vertimas: kiek simbolių skaityti vienu kartu (kerpama ties sakinio riba)
+    TXT_CHUNK_CHARS = int(os.getenv("TXT_CHUNK_CHARS", 8192))
@@ -3,7 +3,8 @@ from datetime import datetime
 from app import create_app, db
 from app.database.models import User
 
-app = create_app()
+# Modeliai vartotojams sukurti nereikalingi
+app = create_app(minimal=True)
 with app.app_context():
     # Išvalo esamas lenteles
     db.drop_all()
@@ -9,14 +9,18 @@
 # git push github main
 
 from app import create_app, db
+from app.database.schema import upgrade_schema
+from app.translation.services.translation_memory import backfill_source_hashes
 
 app = create_app()
 
 with app.app_context():
     db.create_all()
+    upgrade_schema()
+    backfill_source_hashes()
 
 if __name__ == "__main__":
-    app = create_app()
+    # Naudojama ta pati aplikacija: antras create_app() dar kartą paleistų įšildymą ir darbų tęsimą
     with app.test_request_context():
         print("Available routes:")
         for rule in app.url_map.iter_rules():
@@ -0,0 +1,199 @@
+# serve.py
+#
+# Kelių procesų (pre-fork) paleidimas: modeliai ir BERTScore kraunami vieną kartą tėviniame
+# procese, tada fork() sukuria N darbininkų, kurie aptarnauja tą patį lizdą. Modelių svoriai tik
+# skaitomi, todėl jų puslapiai lieka bendri (copy-on-write) ir RAM nedauginama iš N.
+# Reikia os.fork() (Linux/macOS); Windows – run.py.
+#
+#   python serve.py --workers 4 --port 5000
+#   kill -USR1 <tėvo pid>          # atminties ataskaita: bendra / privati kiekvienam darbininkui
+#   curl localhost:5000/health/memory
+
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import time
+
+from config import Config
+
+
+def print_memory_report(parent_pid: int, workers: dict):
+    from app.health.memory import process_memory
+
+    rows = [("tėvas", process_memory(parent_pid))]
+    rows += [(f"darbininkas {slot}", process_memory(pid)) for slot, pid in sorted(workers.items())]
+    print(f"📊 Atmintis, MB {'pid':>8s} {'RSS':>9s} {'PSS':>9s} {'bendra':>9s} {'privati':>9s}")
+    total_pss = 0.0
+    for name, mem in rows:
+        if mem is None:
+            print(f"   {name:14s} (nepasiekiama)")
+            continue
+        total_pss += mem["pss_mb"]
+        print(
+            f"   {name:14s} {mem['pid']:8d} {mem['rss_mb']:9.1f} {mem['pss_mb']:9.1f} "
+            f"{mem['shared_mb']:9.1f} {mem['private_mb']:9.1f}"
+        )
+    # PSS suma – tikroji visų procesų atmintis (bendri puslapiai skaičiuojami vieną kartą)
+    print(f"   Iš viso (PSS suma): {total_pss:.1f} MB")
+
+
+def run_worker(app, sock: socket.socket, slot: int, workers: int, host: str, port: int,
+               resume_jobs: bool) -> int:
+    from werkzeug.serving import make_server
+    import torch
+
+    signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    # Kitaip visi darbininkai gautų tą pačią atsitiktinių skaičių seką (maršrutizatoriaus tyrinėjimas)
+    random.seed()
+
+    # CPU dalijamas tarp darbininkų (ir lygiagrečių modelių kiekviename jų)
+    threads = Config.TORCH_THREADS_PER_MODEL or max(
+        1, (os.cpu_count() or 1) // (workers * max(1, Config.MODEL_PARALLELISM))
+    )
+    torch.set_num_threads(threads)
+
+    svc = app.extensions["translation_service"]
+    if resume_jobs:
+        app.extensions["job_service"].resume_pending()
+
+    server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+    print(f"👷 Darbininkas {slot} (pid {os.getpid()}): {threads} torch gijos")
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        # Antras signalas neturi nutraukti TM eilės įrašymo
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        svc.writer.close()
+        print(f"👋 Darbininkas {slot} (pid {os.getpid()}) sustabdytas")
+    return 0
+
+
+def spawn(app, sock: socket.socket, slot: int, args, resume_jobs: bool) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    code = 1
+    try:
+        code = run_worker(app, sock, slot, args.workers, args.host, args.port, resume_jobs)
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # Vaikas neturi grįžti į tėvo kodą (ir vykdyti jo atexit)
+        os._exit(code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork serveris su bendrais (copy-on-write) modelių svoriais")
+    parser.add_argument("--workers", type=int, default=Config.SERVE_WORKERS)
+    parser.add_argument("--host", default=Config.SERVE_HOST)
+    parser.add_argument("--port", type=int, default=Config.SERVE_PORT)
+    parser.add_argument("--models", default="", help="kableliais atskirti modeliai krovimui tėve (numatyta: WARMUP_MODELS arba visi)")
+    parser.add_argument("--report-after", type=float, default=30.0,
+                        help="po kiek sekundžių išspausdinti atminties ataskaitą (0 – tik per SIGUSR1)")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("❌ serve.py reikia os.fork() (Linux/macOS). Windows sistemoje naudokite run.py")
+
+    from app import create_app, db
+    from app.database.schema import upgrade_schema
+    from app.translation.services.translation_memory import backfill_source_hashes
+
+    # Nebaigti darbai tęsiami tik viename darbininke, o ne tėve (gijos fork() metu nepersikelia)
+    app = create_app(warm_up=False, resume_jobs=False)
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+        backfill_source_hashes()
+        # Tėvo DB jungtys neturi būti bendros su darbininkais
+        db.engine.dispose()
+
+    # 1. Modeliai kraunami vieną kartą, sinchroniškai, prieš fork()
+    svc = app.extensions["translation_service"]
+    svc.warm_up([k for k in args.models.split(",") if k] or None)
+    if svc.warmup_state["status"] != "done":
+        sys.exit(f"❌ Modelių pakrauti nepavyko: {svc.warmup_state['error']}")
+
+    # 2. Lizdas sukuriamas tėve; visi darbininkai priima jungtis iš jo
+    sock = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(128)
+    sock.set_inheritable(True)
+
+    # 3. Esami objektai perkeliami į nuolatinę kartą: GC jų nebeliečia, todėl
+    #    darbininkuose nekopijuojami puslapiai vien dėl šiukšlių surinkimo
+    gc.collect()
+    gc.freeze()
+
+    parent_pid = os.getpid()
+    workers = {}
+    started = {}
+    for slot in range(args.workers):
+        workers[slot] = spawn(app, sock, slot, args, resume_jobs=slot == 0)
+        started[slot] = time.time()
+    print(f"🚀 http://{args.host}:{args.port} – {args.workers} darbininkai (tėvo pid {parent_pid})")
+
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGUSR1, lambda *_: print_memory_report(parent_pid, workers))
+
+    report_at = time.time() + args.report_after if args.report_after > 0 else None
+    while not stopping:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            slot = next((s for s, p in workers.items() if p == pid), None)
+            if slot is None:
+                continue
+            print(f"⚠️ Darbininkas {slot} (pid {pid}) baigėsi su būsena {status}, paleidžiamas iš naujo")
+            # Iškart lūžtantis darbininkas nepaleidinėjamas be pertraukos
+            if time.time() - started[slot] < 5:
+                time.sleep(1)
+            # Naujas darbininkas grąžina į eilę nulūžusio darbininko darbus (jo pid nebegyvas –
+            # JobService.is_orphaned); gyvų darbininkų vykdomi darbai neliečiami
+            workers[slot] = spawn(app, sock, slot, args, resume_jobs=True)
+            started[slot] = time.time()
+            continue
+        if report_at is not None and time.time() >= report_at:
+            print_memory_report(parent_pid, workers)
+            report_at = None
+        time.sleep(0.5)
+
+    print("🛑 Stabdomi darbininkai...")
+    for pid in workers.values():
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    deadline = time.time() + 30
+    while workers and time.time() < deadline:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            workers = {s: p for s, p in workers.items() if p != pid}
+        else:
+            time.sleep(0.2)
+    for pid in workers.values():
+        print(f"⚠️ Darbininkas (pid {pid}) neužsibaigė per 30 s, nutraukiamas")
+        os.kill(pid, signal.SIGKILL)
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()